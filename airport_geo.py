@@ -0,0 +1,113 @@
+# Räumlicher Index für Flughäfen (Web-App und Desktop-App)
+# Beantwortet "welche Flughäfen liegen im Umkreis von 150 km?" und "nächster Flughafen zu diesem Punkt"
+# über ein Gitter aus 1°-Zellen, statt jedes Mal alle Flughäfen durchzurechnen.
+# Schnell genug, um bei jeder Mausbewegung über dem Globus abgefragt zu werden.
+import math
+import threading
+
+from airport_store import airport_store
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180  # ~111.2 km pro Breitengrad
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM  # Halber Erdumfang
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Großkreis-Entfernung zwischen zwei Punkten in Kilometern"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class AirportGeoIndex:
+    """Gitter-Index (Zellen von `cell_deg` Grad) über die Flughafen-Koordinaten"""
+
+    def __init__(self, store, cell_deg=1.0):
+        self.cell_deg = cell_deg
+        self._lon_cells = int(round(360 / cell_deg))
+        self._cells = {}  # (lat_cell, lon_cell) -> [(lat, lon, code)]
+
+        for code in store.codes():
+            apt = store.coords(code)
+            self._cells.setdefault(self._cell(apt['lat'], apt['lon']), []).append((apt['lat'], apt['lon'], code))
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor((lon + 180) / self.cell_deg)) % self._lon_cells
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        """Alle Zellen, die Punkte innerhalb von radius_km enthalten können"""
+        dlat = radius_km / KM_PER_DEGREE
+        lat_min, lat_max = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        lat_cells = range(int(math.floor(lat_min / self.cell_deg)), int(math.floor(lat_max / self.cell_deg)) + 1)
+
+        # Längengrade werden zu den Polen hin enger - mit dem polnächsten Breitengrad rechnen
+        widest_lat = max(abs(lat_min), abs(lat_max))
+        if widest_lat >= 89.9:
+            lon_cells = range(self._lon_cells)
+        else:
+            dlon = dlat / math.cos(math.radians(widest_lat))
+            if dlon >= 180:
+                lon_cells = range(self._lon_cells)
+            else:
+                first = int(math.floor((lon - dlon + 180) / self.cell_deg))
+                last = int(math.floor((lon + dlon + 180) / self.cell_deg))
+                lon_cells = sorted({c % self._lon_cells for c in range(first, last + 1)})
+
+        for lat_cell in lat_cells:
+            for lon_cell in lon_cells:
+                yield lat_cell, lon_cell
+
+    def within_radius(self, lat, lon, radius_km, limit=None):
+        """Flughäfen im Umkreis, nach Entfernung sortiert: [(distanz_km, code, lat, lon)]"""
+        found = []
+        for cell in self._candidate_cells(lat, lon, radius_km):
+            for apt_lat, apt_lon, code in self._cells.get(cell, ()):
+                distance = haversine_km(lat, lon, apt_lat, apt_lon)
+                if distance <= radius_km:
+                    found.append((distance, code, apt_lat, apt_lon))
+        found.sort()
+        return found[:limit] if limit else found
+
+    def nearest(self, lat, lon, k=1):
+        """Die k nächsten Flughäfen: Suchradius wird verdoppelt, bis genug gefunden sind"""
+        radius_km = 100.0
+        while True:
+            found = self.within_radius(lat, lon, radius_km)
+            if len(found) >= k or radius_km >= MAX_DISTANCE_KM:
+                return found[:k]
+            radius_km *= 2
+
+
+_geo_index = None
+_geo_index_lock = threading.Lock()
+
+
+def get_geo_index():
+    """Baut den Index beim ersten Aufruf auf und gibt danach immer dieselbe Instanz zurück"""
+    global _geo_index
+    if _geo_index is None:
+        with _geo_index_lock:
+            if _geo_index is None:
+                _geo_index = AirportGeoIndex(airport_store)
+                print(f"📍 Geo-Index aufgebaut ({len(_geo_index._cells)} Zellen)")
+    return _geo_index
+
+
+def nearby_airports(lat, lon, k=None, radius_km=None):
+    """
+    Nächste k Flughäfen oder alle im Umkreis (beides kombinierbar: k nächste innerhalb des Radius).
+    Gibt eine Liste von Dicts für das Frontend zurück.
+    """
+    index = get_geo_index()
+    if radius_km:
+        found = index.within_radius(lat, lon, radius_km, limit=k)
+    else:
+        found = index.nearest(lat, lon, k or 1)
+
+    return [
+        {'iata': code, 'lat': apt_lat, 'lon': apt_lon, 'distanceKm': round(distance, 1),
+         'country': airport_store.country(code)}
+        for distance, code, apt_lat, apt_lon in found
+    ]
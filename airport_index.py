@@ -0,0 +1,191 @@
+# Schnelle Flughafen-Suche (Autocomplete) für Web-App und Desktop-App
+# Der Index wird einmal aus den airportsdata-Datensätzen aufgebaut und beantwortet Eingaben wie
+# "fra", "Frankf", "frnkfurt" oder "EDDF" direkt im Speicher, ohne search_airport-Aufruf.
+import bisect
+import threading
+import unicodedata
+
+from fast_flights import Airport
+
+from airport_store import airport_store
+
+MIN_TRIGRAM_SCORE = 0.3  # Mindest-Ähnlichkeit für Treffer mit Tippfehlern (nur Vorschläge, nie Auflösung)
+DOMINANT_FACTOR = 2  # resolve(): Präfix-Treffer muss so viel besser sein als der zweitbeste
+
+# Flughäfen, die fast_flights kennt (Google Flights); gehen bei gleicher Punktzahl vor
+KNOWN_CODES = frozenset(airport.value for airport in Airport)
+
+
+def normalize(text):
+    """Kleinbuchstaben, ohne Akzente: 'Düsseldorf' -> 'dusseldorf'"""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AirportIndex:
+    """
+    Präfix-Index (sortierte Token-Liste + bisect) und Trigramm-Index für Tippfehler.
+    Durchsucht IATA, ICAO, Name, Stadt und Land.
+    """
+
+    def __init__(self, airports):
+        self.entries = []  # Liste von Dicts (iata, icao, name, city, country, lat, lon)
+        self._tokens = []  # sortiert: (token, entry_idx, gewichtung)
+        self._trigrams = {}  # trigramm -> set(entry_idx)
+        self._by_code = {}  # 'fra' / 'eddf' -> entry_idx
+        self._gram_counts = []  # Anzahl Trigramme pro Eintrag (für die Ähnlichkeit)
+        self._exact = {}  # vollständige Stadt / vollständiger Name -> [entry_idx]
+        self._rank = []  # Bedeutung des Flughafens bei Gleichstand: bekannt (2) + international (1)
+
+        for code, apt in airports.items():
+            idx = len(self.entries)
+            entry = {
+                'iata': code,
+                'icao': apt.get('icao', ''),
+                'name': apt.get('name', ''),
+                'city': apt.get('city', ''),
+                'country': apt.get('country', ''),
+                'lat': apt.get('lat'),
+                'lon': apt.get('lon'),
+            }
+            self.entries.append(entry)
+
+            self._by_code[code.lower()] = idx
+            if entry['icao']:
+                self._by_code.setdefault(entry['icao'].lower(), idx)
+
+            city = normalize(entry['city'])
+            name = normalize(entry['name'])
+            self._rank.append(2 * (code in KNOWN_CODES) + ('international' in name))
+            for text in {city, name} - {''}:
+                self._exact.setdefault(text, []).append(idx)
+            # Gewichtung: Stadt vor Flughafenname vor Land
+            for token in city.split():
+                self._tokens.append((token, idx, 3))
+            if city:
+                self._tokens.append((city, idx, 3))
+            for token in name.split():
+                self._tokens.append((token, idx, 2))
+            self._tokens.append((normalize(entry['country']), idx, 1))
+
+            grams = trigrams(city or name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, set()).add(idx)
+
+        self._tokens.sort()
+        self._token_keys = [token for token, _, _ in self._tokens]
+
+    def _prefix_matches(self, prefix):
+        """Alle (entry_idx, gewichtung) deren Token mit `prefix` beginnt"""
+        start = bisect.bisect_left(self._token_keys, prefix)
+        matches = {}
+        for i in range(start, len(self._tokens)):
+            token, idx, weight = self._tokens[i]
+            if not token.startswith(prefix):
+                break
+            # Vollständiger Token-Treffer zählt mehr als ein reiner Präfix
+            score = weight * (2 if token == prefix else 1)
+            if score > matches.get(idx, 0):
+                matches[idx] = score
+        return matches
+
+    def _fuzzy_matches(self, query):
+        """Trigramm-Ähnlichkeit (Dice-Koeffizient) für Eingaben mit Tippfehlern"""
+        query_grams = trigrams(query)
+        counts = {}
+        for gram in query_grams:
+            for idx in self._trigrams.get(gram, ()):
+                counts[idx] = counts.get(idx, 0) + 1
+
+        matches = {}
+        for idx, shared in counts.items():
+            score = 2 * shared / (len(query_grams) + self._gram_counts[idx])
+            if score >= MIN_TRIGRAM_SCORE:
+                matches[idx] = score
+        return matches
+
+    def _scores(self, query, fuzzy, limit):
+        """{entry_idx: punktzahl} für eine normalisierte Eingabe"""
+        scores = {}
+
+        # 1. Exakter IATA/ICAO-Code
+        code_idx = self._by_code.get(query)
+        if code_idx is not None:
+            scores[code_idx] = 100
+
+        # 2. Präfix-Treffer über alle Wörter der Eingabe (alle Wörter müssen passen)
+        words = query.split()
+        word_matches = [self._prefix_matches(word) for word in words]
+        if word_matches and all(word_matches):
+            common = set.intersection(*(set(m) for m in word_matches))
+            for idx in common:
+                scores[idx] = max(scores.get(idx, 0), 10 * sum(m[idx] for m in word_matches))
+
+        # 3. Tippfehler-tolerante Suche, wenn es kaum Präfix-Treffer gibt
+        if fuzzy and len(scores) < limit and len(query) >= 3:
+            for idx, similarity in self._fuzzy_matches(query).items():
+                scores[idx] = max(scores.get(idx, 0), 20 * similarity)
+
+        return scores
+
+    def _ranked(self, scores):
+        """Nach Punktzahl, bei Gleichstand bedeutende Flughäfen zuerst"""
+        return sorted(scores.items(), key=lambda item: (-item[1], -self._rank[item[0]], self.entries[item[0]]['iata']))
+
+    def suggest(self, query, limit=8):
+        """Rangierte Vorschläge für eine Eingabe (Code, Stadt, Name, Land, mit Tippfehler-Toleranz)"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        ranked = self._ranked(self._scores(query, fuzzy=True, limit=limit))
+        return [{**self.entries[idx], 'score': round(score, 2)} for idx, score in ranked[:limit]]
+
+    def resolve(self, query):
+        """
+        IATA-Code für eine Eingabe, aber nur wenn er eindeutig ist: exakter Code, exakte Stadt bzw.
+        exakter Name (bei mehreren der einzige bei fast_flights bekannte) oder ein klar führender Präfix-Treffer.
+        Sonst None - der Aufrufer fällt dann auf search_airport zurück. Tippfehler-Treffer zählen nie.
+        """
+        query = normalize(query)
+        if not query:
+            return None
+
+        code_idx = self._by_code.get(query)
+        if code_idx is not None:
+            return self.entries[code_idx]['iata']
+
+        exact = self._exact.get(query)
+        if exact:
+            # Mehrere gleichnamige Flughäfen: nur eindeutig, wenn genau einer bei fast_flights bekannt ist
+            known = [idx for idx in exact if self.entries[idx]['iata'] in KNOWN_CODES]
+            candidates = known or exact
+            return self.entries[candidates[0]]['iata'] if len(candidates) == 1 else None
+
+        ranked = self._ranked(self._scores(query, fuzzy=False, limit=2))
+        if not ranked:
+            return None
+        if len(ranked) > 1 and ranked[0][1] < DOMINANT_FACTOR * ranked[1][1]:
+            return None
+        return self.entries[ranked[0][0]]['iata']
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_airport_index():
+    """Baut den Index beim ersten Aufruf auf und gibt danach immer dieselbe Instanz zurück"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = AirportIndex(airport_store.records())
+                print(f"🔎 Flughafen-Index aufgebaut ({len(_index.entries)} Flughäfen)")
+    return _index
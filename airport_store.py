@@ -0,0 +1,205 @@
+# Kompakte Flughafen-Datenbank für Web-App und Desktop-App
+# airportsdata.load('IATA') baut ein Dict aus Dicts mit allen Feldern für jeden Flughafen,
+# gebraucht werden aber fast nur die Koordinaten. Hier werden nur die benötigten Spalten
+# als Arrays gehalten (Koordinaten, Land, Zeitzone) und erst beim ersten Zugriff geladen.
+# Optional wird eine vorgebaute Binärdatei per mmap eingebunden (kein CSV-Parsing beim Start).
+import os
+import sys
+import mmap
+import array
+import struct
+import threading
+
+import airportsdata
+
+# Dateiformat: Header, IATA-Codes (je 3 Byte), Breiten- und Längengrade (float64),
+# Länder (je 2 Byte), Zeitzonen-Index (uint16) und die Zeitzonen-Tabelle (UTF-8, '\n'-getrennt)
+_MAGIC = b'TFAP'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sIII')  # magic, version, count, tz_table_len
+
+
+def _align8(offset):
+    return (offset + 7) & ~7
+
+
+class AirportStore:
+    """Spaltenbasierte, lazy geladene Flughafen-Daten (IATA-Code -> Koordinaten, Land, Zeitzone)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._codes = []  # interned IATA-Codes
+        self._positions = {}  # IATA-Code -> Zeile
+        self._lats = None  # array('d') oder memoryview auf die mmap-Datei
+        self._lons = None
+        self._countries = []
+        self._tz_table = []
+        self._tz_index = None
+        self._mmap = None
+
+    # --- Laden ---
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.path and os.path.exists(self.path):
+                try:
+                    self._load_file()
+                    self._loaded = True
+                    print(f"🗺️ Flughafendatenbank aus {self.path} eingebunden ({len(self._codes)} Einträge)")
+                    return
+                except Exception as e:
+                    print(f"⚠️ Flughafen-Datei ungültig, baue neu auf: {e}")
+                    # Teilweise gefüllte Spalten verwerfen, sonst passen die Indizes nicht mehr zusammen
+                    self._reset()
+
+            self._build_from_airportsdata()
+            self._loaded = True
+            print(f"🗺️ Flughafendatenbank geladen ({len(self._codes)} Einträge)")
+
+            if self.path:
+                try:
+                    self.write_file(self.path)
+                except Exception as e:
+                    print(f"⚠️ Flughafen-Datei konnte nicht geschrieben werden: {e}")
+
+    def _reset(self):
+        """Verwirft (teilweise) geladene Daten und gibt die mmap-Datei frei"""
+        for view in (self._lats, self._lons, self._tz_index):
+            if isinstance(view, memoryview):
+                view.release()
+        self._codes = []
+        self._positions = {}
+        self._lats = self._lons = self._tz_index = None
+        self._countries = []
+        self._tz_table = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _build_from_airportsdata(self):
+        records = airportsdata.load('IATA')
+        lats, lons = array.array('d'), array.array('d')
+        tz_positions = {}
+        tz_index = array.array('H')
+
+        for code, apt in records.items():
+            self._positions[code] = len(self._codes)
+            self._codes.append(sys.intern(code))
+            lats.append(apt['lat'])
+            lons.append(apt['lon'])
+            self._countries.append(sys.intern(apt.get('country') or ''))
+            tz = apt.get('tz') or ''
+            if tz not in tz_positions:
+                tz_positions[tz] = len(self._tz_table)
+                self._tz_table.append(sys.intern(tz))
+            tz_index.append(tz_positions[tz])
+
+        self._lats, self._lons, self._tz_index = lats, lons, tz_index
+
+    def _load_file(self):
+        with open(self.path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmap = mm  # Schon hier merken, damit _reset() die Datei bei einem Fehler schließen kann
+        magic, version, count, tz_len = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError('Unbekanntes Dateiformat')
+
+        view = memoryview(mm)
+        try:
+            offset = _HEADER.size
+            codes_raw = bytes(view[offset:offset + 3 * count])
+            offset = _align8(offset + 3 * count)
+            # Koordinaten bleiben in der mmap-Datei (kein Kopieren in den Speicher)
+            self._lats = view[offset:offset + 8 * count].cast('d')
+            offset += 8 * count
+            self._lons = view[offset:offset + 8 * count].cast('d')
+            offset += 8 * count
+            countries_raw = bytes(view[offset:offset + 2 * count])
+            offset += 2 * count
+            self._tz_index = view[offset:offset + 2 * count].cast('H')
+            offset += 2 * count
+            tz_raw = bytes(view[offset:offset + tz_len]).decode('utf-8')
+            self._tz_table = [sys.intern(tz) for tz in tz_raw.split('\n')]
+
+            for i in range(count):
+                code = sys.intern(codes_raw[3 * i:3 * i + 3].decode('ascii'))
+                self._positions[code] = i
+                self._codes.append(code)
+                self._countries.append(sys.intern(countries_raw[2 * i:2 * i + 2].decode('ascii').strip()))
+        finally:
+            # Nur die Basis-Sicht freigeben; die Spalten-Sichten bleiben gültig, bis _reset() sie freigibt
+            view.release()
+
+    def write_file(self, path):
+        """Schreibt die Daten als Binärdatei, die beim nächsten Start per mmap geladen wird"""
+        self._ensure_loaded()
+        count = len(self._codes)
+        tz_bytes = '\n'.join(self._tz_table).encode('utf-8')
+
+        parts = [_HEADER.pack(_MAGIC, _FORMAT_VERSION, count, len(tz_bytes))]
+        parts.append(''.join(self._codes).encode('ascii'))
+        header_and_codes = _HEADER.size + 3 * count
+        parts.append(b'\0' * (_align8(header_and_codes) - header_and_codes))
+        parts.append(array.array('d', self._lats).tobytes())
+        parts.append(array.array('d', self._lons).tobytes())
+        parts.append(''.join(c.ljust(2)[:2] for c in self._countries).encode('ascii'))
+        parts.append(array.array('H', self._tz_index).tobytes())
+        parts.append(tz_bytes)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, path)
+
+    # --- Abfragen ---
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._codes)
+
+    def __contains__(self, code):
+        self._ensure_loaded()
+        return code in self._positions
+
+    def coords(self, code):
+        """{'lat': ..., 'lon': ...} für einen IATA-Code oder None"""
+        self._ensure_loaded()
+        i = self._positions.get(code)
+        if i is None:
+            return None
+        return {'lat': self._lats[i], 'lon': self._lons[i]}
+
+    def country(self, code):
+        self._ensure_loaded()
+        i = self._positions.get(code)
+        return self._countries[i] if i is not None else None
+
+    def timezone(self, code):
+        self._ensure_loaded()
+        i = self._positions.get(code)
+        return self._tz_table[self._tz_index[i]] if i is not None else None
+
+    def codes(self):
+        self._ensure_loaded()
+        return list(self._codes)
+
+    def records(self):
+        """
+        Vollständige Datensätze aus airportsdata (Name, Stadt, ICAO, ...).
+        Wird nicht zwischengespeichert - nur für einmalige Aufbauten wie den Such-Index gedacht.
+        """
+        return airportsdata.load('IATA')
+
+
+# Gemeinsame Instanz für Web-App und Desktop-App
+# Standardmäßig wird die Binärdatei im lokalen Datenordner abgelegt (TRAVELFOLIO_AIRPORT_FILE='' deaktiviert das)
+_default_file = os.path.join(os.path.expanduser("~"), ".travelfolio",
+                             f"airports-{getattr(airportsdata, '__version__', 'current')}.bin")
+airport_store = AirportStore(os.environ.get('TRAVELFOLIO_AIRPORT_FILE', _default_file) or None)
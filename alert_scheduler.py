@@ -0,0 +1,149 @@
+# Zeitplanung für Preisalarme (Web-App und Desktop-App)
+# Statt alle Alerts stur jede Stunde zu prüfen, bekommt jeder Alert einen eigenen Fälligkeitszeitpunkt.
+# Alerts mit baldigem Abflug oder stark schwankenden Preisen werden häufiger geprüft,
+# Alerts für Flüge in mehreren Monaten mit stabilem Preis deutlich seltener.
+import os
+import json
+import time
+import heapq
+import datetime
+import threading
+
+# Grenzen für das Prüfintervall (Sekunden)
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = 24 * 3600
+
+# Anzahl der zuletzt gesehenen Preise, aus denen die Schwankung berechnet wird
+PRICE_HISTORY_SIZE = 6
+
+
+def base_interval(departure_date, now=None):
+    """Grundintervall anhand der Tage bis zum Abflug"""
+    now = now or datetime.datetime.now()
+    try:
+        departure = datetime.datetime.strptime(str(departure_date), '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return 3600
+
+    days_left = (departure - now).total_seconds() / 86400
+    if days_left < 0:
+        return MAX_INTERVAL  # Abflug vorbei - kaum noch relevant
+    if days_left <= 3:
+        return 30 * 60
+    if days_left <= 14:
+        return 3600
+    if days_left <= 60:
+        return 3 * 3600
+    return 12 * 3600
+
+
+def price_volatility(prices):
+    """Relative Schwankung der letzten Preise ((max - min) / Mittelwert), 0.0 bei zu wenig Daten"""
+    prices = [p for p in prices if p]
+    if len(prices) < 2:
+        return 0.0
+    mean = sum(prices) / len(prices)
+    return (max(prices) - min(prices)) / mean if mean else 0.0
+
+
+def compute_interval(departure_date, prices, now=None):
+    """Prüfintervall in Sekunden aus Abflugnähe und Preisschwankung"""
+    interval = base_interval(departure_date, now)
+
+    volatility = price_volatility(prices)
+    if volatility >= 0.10:
+        interval /= 2  # Preis bewegt sich stark - öfter nachsehen
+    elif len(prices) >= 3 and volatility < 0.01:
+        interval *= 2  # Preis ist stabil - seltener nachsehen
+
+    return int(min(max(interval, MIN_INTERVAL), MAX_INTERVAL))
+
+
+class AlertScheduler:
+    """
+    Priority-Queue (Min-Heap) mit dem nächsten Fälligkeitszeitpunkt pro Alert.
+    Fälligkeiten und die letzten Preise werden als JSON gespeichert und überstehen so Neustarts.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._due = {}  # alert_key -> due_at (Unix-Timestamp)
+        self._prices = {}  # alert_key -> [letzte Preise]
+        self._heap = []  # (due_at, alert_key), veraltete Einträge werden beim Auslesen übersprungen
+        self.load()
+
+    def load(self):
+        """Lädt gespeicherte Fälligkeiten (falls vorhanden)"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Alarm-Zeitplan konnte nicht geladen werden: {e}")
+            return
+
+        with self._lock:
+            for key, entry in data.items():
+                self._due[key] = entry.get('due', 0)
+                self._prices[key] = entry.get('prices', [])
+            self._heap = [(due_at, key) for key, due_at in self._due.items()]
+            heapq.heapify(self._heap)
+        print(f"🗓️ Alarm-Zeitplan geladen ({len(self._due)} Alerts)")
+
+    def save(self):
+        """Speichert den Zeitplan atomar (erst in temporäre Datei, dann umbenennen)"""
+        with self._lock:
+            data = {key: {'due': due_at, 'prices': self._prices.get(key, [])} for key, due_at in self._due.items()}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def is_due(self, key, now=None):
+        """Unbekannte Alerts sind sofort fällig"""
+        now = now or time.time()
+        with self._lock:
+            return self._due.get(key, 0) <= now
+
+    def record(self, key, departure_date, price, now=None):
+        """Merkt sich den gefundenen Preis und plant die nächste Prüfung ein"""
+        now = now or time.time()
+        with self._lock:
+            prices = self._prices.setdefault(key, [])
+            if price is not None:
+                prices.append(price)
+                del prices[:-PRICE_HISTORY_SIZE]
+
+            due_at = now + compute_interval(departure_date, prices, datetime.datetime.fromtimestamp(now))
+            self._due[key] = due_at
+            heapq.heappush(self._heap, (due_at, key))
+            return due_at
+
+    def retain(self, keys):
+        """Entfernt Alerts, die nicht mehr existieren (z.B. gelöscht)"""
+        keys = set(keys)
+        with self._lock:
+            for key in list(self._due):
+                if key not in keys:
+                    del self._due[key]
+                    self._prices.pop(key, None)
+
+    def next_due(self):
+        """Zeitpunkt der nächsten fälligen Prüfung (oder None, wenn nichts geplant ist)"""
+        with self._lock:
+            while self._heap:
+                due_at, key = self._heap[0]
+                if self._due.get(key) == due_at:
+                    return due_at
+                heapq.heappop(self._heap)  # Veralteter Eintrag
+            return None
+
+    def seconds_until_next(self, min_wait, max_wait, now=None):
+        """Wartezeit bis zur nächsten Fälligkeit, begrenzt auf [min_wait, max_wait]"""
+        now = now or time.time()
+        next_due = self.next_due()
+        if next_due is None:
+            return max_wait
+        return min(max(next_due - now, min_wait), max_wait)
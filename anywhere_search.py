@@ -0,0 +1,122 @@
+# "Überall hin"-Suche: ein Abflugort, viele Ziele (Web-App)
+# Die Ziele werden parallel gesucht; ein globales Rate-Limit schützt vor zu vielen Scrapes auf einmal
+# (gilt nur für echte Scrapes, nicht für Ergebnisse aus Cache oder Historie).
+# Ergebnisse werden geliefert, sobald sie da sind, damit der Globus sie direkt anzeigen kann.
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from search_engine import find_flights
+
+MAX_DESTINATIONS = 50
+ANYWHERE_WORKERS = int(os.environ.get('TRAVELFOLIO_ANYWHERE_WORKERS', 4))  # Max. gleichzeitige Suchen pro Anfrage
+
+
+class TokenBucket:
+    """Einfaches Token-Bucket-Rate-Limit (thread-sicher)"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate  # Tokens pro Sekunde
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blockiert, bis ein Token verfügbar ist"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Gilt für alle "Überall hin"-Anfragen gemeinsam
+scrape_limiter = TokenBucket(
+    rate=float(os.environ.get('TRAVELFOLIO_SCRAPE_RATE', 1.0)),
+    burst=int(os.environ.get('TRAVELFOLIO_SCRAPE_BURST', 4)),
+)
+
+
+def select_destinations(airports_db, origin, destinations=None, country=None, region=None, limit=25):
+    """
+    Zielliste aus expliziten IATA-Codes oder aus airports_db (AirportStore) gefiltert nach
+    Land (ISO-Code, z.B. 'ES') und/oder Region (Zeitzonen-Präfix, z.B. 'Europe').
+    Ungültige Eingaben (z.B. destinations als Text oder limit < 1) werfen ValueError.
+    """
+    if isinstance(limit, bool) or not isinstance(limit, (int, str)):
+        raise ValueError('limit muss eine ganze Zahl sein')
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit muss eine ganze Zahl sein')
+    if limit < 1:
+        raise ValueError('limit muss mindestens 1 sein')
+
+    if destinations:
+        if not isinstance(destinations, list):
+            raise ValueError('destinations muss eine Liste von IATA-Codes sein')
+        codes = []
+        for code in destinations:
+            if not isinstance(code, str) or len(code.strip()) != 3 or not code.strip().isalpha():
+                raise ValueError(f'Ungültiger IATA-Code in destinations: {code!r}')
+            codes.append(code.strip().upper())
+    else:
+        if not country and not region:
+            raise ValueError('Ziele benötigen destinations, country oder region')
+        if not isinstance(country or '', str) or not isinstance(region or '', str):
+            raise ValueError('country und region müssen Text sein')
+        country = country.upper() if country else None
+        codes = [
+            code for code in airports_db.codes()
+            if (not country or airports_db.country(code) == country)
+            and (not region or airports_db.timezone(code).startswith(region))
+        ]
+        codes.sort()
+
+    # Doppelte und den Abflugort entfernen, Reihenfolge beibehalten
+    seen = {origin}
+    unique = []
+    for code in codes:
+        if code not in seen:
+            seen.add(code)
+            unique.append(code)
+    return unique[:min(limit, MAX_DESTINATIONS)]
+
+
+def iter_cheapest_fares(origin, destinations, date, passengers, max_workers=None):
+    """Sucht alle Ziele parallel und liefert pro Ziel den günstigsten Flug, sobald er gefunden ist"""
+    def search_destination(dest):
+        # Token nur für echte Scrapes - Treffer aus Cache/Historie werden nicht gebremst
+        table = find_flights(origin, dest, date, passengers, purpose='anywhere', before_scrape=scrape_limiter.acquire)
+        cheapest = table.cheapest()
+        if not cheapest:
+            return {'destination': dest, 'price': None, 'flights': len(table)}
+        return {
+            'destination': dest,
+            'price': cheapest['priceValue'],
+            'airline': cheapest['airline'],
+            'departure': cheapest['departure'],
+            'duration': cheapest['duration'],
+            'stops': cheapest['stops'],
+            'flights': len(table),
+        }
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or ANYWHERE_WORKERS, thread_name_prefix='anywhere')
+    try:
+        futures = {executor.submit(search_destination, dest): dest for dest in destinations}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"   ⚠️ Fehler bei Suche {origin} → {futures[future]}: {e}")
+                yield {'destination': futures[future], 'price': None, 'error': str(e)}
+    finally:
+        # Bei Verbindungsabbruch keine weiteren Suchen mehr starten
+        executor.shutdown(wait=False, cancel_futures=True)
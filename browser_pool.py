@@ -0,0 +1,259 @@
+# Pool aus vorgestarteten Playwright-Browser-Kontexten für fetch_mode="local"
+# fast-flights startet bei jedem get_flights(..., fetch_mode="local") einen neuen Chromium.
+# Hier läuft ein Browser dauerhaft in einem eigenen Thread (mit eigener asyncio-Loop),
+# die Suchen leihen sich einen Kontext aus dem Pool und geben ihn danach zurück.
+import os
+import atexit
+import asyncio
+import threading
+import concurrent.futures
+
+from fast_flights import get_flights
+
+try:
+    # Interne Bausteine von fast-flights, um nur den Abruf der Seite selbst zu übernehmen
+    from fast_flights import TFSData
+    from fast_flights.core import parse_response
+    from playwright.async_api import async_playwright
+    POOL_AVAILABLE = True
+except ImportError:
+    POOL_AVAILABLE = False
+
+FLIGHTS_URL = "https://www.google.com/travel/flights"
+
+
+class _PageResponse:
+    """Minimales Response-Objekt, wie es parse_response von fast-flights erwartet"""
+    status_code = 200
+
+    def __init__(self, body):
+        self.text = body
+        self.text_markdown = body
+
+
+class _PooledContext:
+    def __init__(self, context):
+        self.context = context
+        self.uses = 0
+        self.broken = False  # z.B. Seite ließ sich nicht schließen - Kontext nicht wiederverwenden
+
+
+class BrowserPool:
+    """
+    Verwaltet einen Chromium-Browser und bis zu `size` wiederverwendbare Kontexte.
+    Kontexte werden nach `max_uses` Suchen oder nach einem Fehler neu erstellt,
+    ein abgestürzter Browser wird beim nächsten Zugriff neu gestartet.
+    """
+
+    def __init__(self, size=2, max_uses=50, timeout=60):
+        self.size = size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.stats = {'fetches': 0, 'contextsCreated': 0, 'contextsRecycled': 0, 'browserLaunches': 0,
+                      'errors': 0, 'timeouts': 0}
+        self._stats_lock = threading.Lock()  # Zähler werden aus mehreren Threads verändert
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # Werden in der Pool-Loop angelegt
+        self._playwright = None
+        self._browser = None
+        self._idle = None  # asyncio.Queue mit freien Kontexten
+        self._slots = None  # asyncio.Semaphore, begrenzt die Anzahl der Kontexte
+        self._browser_lock = None
+
+    # --- Thread / Loop ---
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+
+            def run_loop():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._idle = asyncio.Queue()
+                self._slots = asyncio.Semaphore(self.size)
+                self._browser_lock = asyncio.Lock()
+                ready.set()
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name='browser-pool', daemon=True)
+            self._thread.start()
+            ready.wait()
+            atexit.register(self.close)
+
+    def _call(self, coro, timeout=None):
+        """Führt eine Coroutine in der Pool-Loop aus und wartet (synchron) auf das Ergebnis"""
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Coroutine abbrechen, sonst läuft sie weiter und blockiert ihren Kontext/Slot im Pool
+            future.cancel()
+            raise
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    # --- Browser / Kontexte ---
+
+    async def _get_browser(self):
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch()
+                self._count('browserLaunches')
+                print(f"🧭 Browser-Pool: Chromium gestartet (Größe {self.size}, max. {self.max_uses} Nutzungen/Kontext)")
+            return self._browser
+
+    async def _new_context(self):
+        browser = await self._get_browser()
+        context = await browser.new_context()
+        self._count('contextsCreated')
+        return _PooledContext(context)
+
+    async def _discard(self, pooled):
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    async def _acquire(self):
+        """Holt einen gesunden Kontext aus dem Pool (oder erstellt einen neuen)"""
+        await self._slots.acquire()
+        try:
+            while not self._idle.empty():
+                pooled = self._idle.get_nowait()
+                # Health-Check: Browser noch verbunden?
+                if pooled.context.browser and pooled.context.browser.is_connected():
+                    return pooled
+                await self._discard(pooled)
+            return await self._new_context()
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def _release(self, pooled, healthy):
+        pooled.uses += 1
+        if healthy and not pooled.broken and pooled.uses < self.max_uses:
+            self._idle.put_nowait(pooled)
+        else:
+            # Verbraucht oder fehlerhaft - schließen, beim nächsten Bedarf wird ein neuer erstellt
+            self._count('contextsRecycled')
+            await self._discard(pooled)
+        self._slots.release()
+
+    async def _fetch(self, url, timeout=None):
+        # Das Zeitlimit beginnt erst mit dem Ausleihen des Kontexts - Warten auf einen freien Slot
+        # (mehr Such-Worker als Kontexte) ist kein Timeout
+        pooled = await self._acquire()
+        healthy = False
+        try:
+            body = await asyncio.wait_for(self._load(pooled, url), timeout)
+            healthy = True
+            return body
+        except asyncio.TimeoutError:
+            self._count('timeouts')
+            raise
+        finally:
+            await self._release(pooled, healthy)
+
+    async def _load(self, pooled, url):
+        page = await pooled.context.new_page()
+        try:
+            await page.goto(url)
+            if page.url.startswith("https://consent.google.com"):
+                await page.click('text="Accept all"')
+            await page.locator('.eQ35Ce').wait_for()
+            return await page.evaluate("() => document.querySelector('[role=\"main\"]').innerHTML")
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pooled.broken = True
+
+    async def _warm_up(self):
+        # Kontexte vorab erstellen, damit die erste Suche keinen Kaltstart hat
+        for _ in range(self.size - self._idle.qsize()):
+            await self._slots.acquire()
+            try:
+                self._idle.put_nowait(await self._new_context())
+            finally:
+                self._slots.release()
+
+    async def _close(self):
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    # --- Öffentliche API ---
+
+    def fetch_html(self, params):
+        """Lädt die Google-Flights-Ergebnisseite für die Query-Parameter und gibt das HTML zurück"""
+        url = FLIGHTS_URL + "?" + "&".join(f"{k}={v}" for k, v in params.items())
+        try:
+            body = self._call(self._fetch(url, self.timeout))
+            self._count('fetches')
+            return body
+        except Exception:
+            self._count('errors')
+            raise
+
+    def warm_up(self):
+        """Startet Browser und Kontexte im Hintergrund (blockiert nicht)"""
+        if not POOL_AVAILABLE:
+            return
+        self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._warm_up(), self._loop)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"⚠️ Browser-Pool Warm-up fehlgeschlagen: {f.exception()}"))
+
+    def close(self):
+        if self._loop is None or not self._loop.is_running():
+            return
+        try:
+            self._call(self._close(), 10)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+browser_pool = BrowserPool(
+    size=int(os.environ.get('TRAVELFOLIO_BROWSER_POOL_SIZE', 2)),
+    max_uses=int(os.environ.get('TRAVELFOLIO_BROWSER_MAX_USES', 50)),
+)
+POOL_ENABLED = POOL_AVAILABLE and os.environ.get('TRAVELFOLIO_BROWSER_POOL', '1') != '0'
+
+
+def pooled_get_flights(*, flight_data, trip, seat, passengers, fetch_mode="local", max_stops=None):
+    """
+    Wie `get_flights`, aber bei fetch_mode="local" wird ein Kontext aus dem Browser-Pool verwendet.
+    Ohne Pool (deaktiviert oder Playwright nicht verfügbar) wird direkt get_flights aufgerufen.
+    """
+    if fetch_mode != "local" or not POOL_ENABLED:
+        return get_flights(flight_data=flight_data, trip=trip, seat=seat, passengers=passengers,
+                           fetch_mode=fetch_mode, max_stops=max_stops)
+
+    # Gleiche Parameter wie fast_flights.core.get_flights_from_filter
+    tfs = TFSData.from_interface(flight_data=flight_data, trip=trip, passengers=passengers, seat=seat,
+                                 max_stops=max_stops)
+    params = {
+        "tfs": tfs.as_b64().decode("utf-8"),
+        "hl": "en",
+        "tfu": "EgQIABABIgA",
+        "curr": "",
+    }
+    body = browser_pool.fetch_html(params)
+    return parse_response(_PageResponse(body))
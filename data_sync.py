@@ -0,0 +1,123 @@
+# Inkrementelles Laden von Trips und Alerts (Web-App und Desktop-App)
+# Jeder gespeicherte Trip/Alert bekommt einen Zeitstempel 'updatedAt' (Millisekunden seit 1970),
+# gelöschte Dokumente hinterlassen einen Grabstein in der Collection 'deleted'.
+# Ein Client, der schon Daten hat, fragt mit `since` nur noch nach Änderungen seit dem letzten Abruf -
+# Ladezeit und Firestore-Lesevorgänge wachsen dann mit den Änderungen, nicht mit dem Gesamtbestand.
+import os
+import time
+import hashlib
+
+KINDS = ('trips', 'alerts')
+TOMBSTONES = 'deleted'
+
+# Grabsteine werden nach dieser Zeit entfernt; ältere `since`-Werte bekommen wieder alle Daten
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TRAVELFOLIO_TOMBSTONE_RETENTION_DAYS', 30))
+# Überlappung beim Delta-Abruf, damit leicht abweichende Server-Uhren keine Änderung verschlucken
+SYNC_OVERLAP_MS = 5000
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def stamp(data, updated_at=None):
+    """Kopie der Daten mit aktuellem 'updatedAt'"""
+    return {**(data or {}), 'updatedAt': updated_at or now_ms()}
+
+
+def tombstone_id(kind, doc_id):
+    return f"{kind}:{doc_id}"
+
+
+def tombstone(kind, doc_id, deleted_at=None):
+    """Grabstein-Dokument für ein gelöschtes Dokument"""
+    return {'kind': kind, 'id': str(doc_id), 'updatedAt': deleted_at or now_ms()}
+
+
+def user_key(user_id):
+    """Kurzer, nicht umkehrbarer Schlüssel des Users - der Client merkt sich damit, wem sein Cache gehört"""
+    return hashlib.sha256(str(user_id).encode()).hexdigest()[:16]
+
+
+def save_doc(user_ref, kind, doc_id, data):
+    """Speichert einen Trip/Alert mit Zeitstempel (ein älterer Grabstein wird in load_user_data übergangen)"""
+    data = stamp(data)
+    user_ref.collection(kind).document(str(doc_id)).set(data)
+    return data
+
+
+def delete_doc(client, user_ref, kind, doc_id):
+    """Löscht einen Trip/Alert und legt im selben Batch einen Grabstein an"""
+    batch = client.batch()
+    batch.delete(user_ref.collection(kind).document(str(doc_id)))
+    batch.set(user_ref.collection(TOMBSTONES).document(tombstone_id(kind, doc_id)), tombstone(kind, doc_id))
+    batch.commit()
+
+
+def load_user_data(user_ref, since=None):
+    """
+    Trips und Alerts eines Users.
+    Ohne `since` (oder wenn `since` älter als die Aufbewahrung der Grabsteine ist) kommen alle Daten
+    ({'full': True}), sonst nur seit `since` geänderte Dokumente und die IDs gelöschter Dokumente.
+    `serverTime` ist der Wert für `since` beim nächsten Abruf.
+    """
+    server_time = now_ms()
+    retention_ms = TOMBSTONE_RETENTION_DAYS * 86400 * 1000
+    full = not since or since < server_time - retention_ms
+
+    if full:
+        trips = {doc.id: doc.to_dict() for doc in user_ref.collection('trips').stream()}
+        alerts = [{**doc.to_dict(), 'id': doc.id} for doc in user_ref.collection('alerts').stream()]
+        _prune_tombstones(user_ref, server_time - retention_ms)
+        return {'full': True, 'trips': trips, 'alerts': alerts, 'deleted': {kind: [] for kind in KINDS},
+                'serverTime': server_time}
+
+    cutoff = since - SYNC_OVERLAP_MS
+    changed = {kind: list(user_ref.collection(kind).where('updatedAt', '>', cutoff).stream()) for kind in KINDS}
+    deleted = {kind: [] for kind in KINDS}
+    for doc in user_ref.collection(TOMBSTONES).where('updatedAt', '>', cutoff).stream():
+        entry = doc.to_dict()
+        if entry.get('kind') in deleted:
+            deleted[entry['kind']].append(entry.get('id'))
+
+    # Ein Dokument, das nach dem Löschen neu angelegt wurde, gilt als geändert, nicht als gelöscht
+    for kind in KINDS:
+        current = {doc.id for doc in changed[kind]}
+        deleted[kind] = [doc_id for doc_id in deleted[kind] if doc_id not in current]
+
+    return {
+        'full': False,
+        'trips': {doc.id: doc.to_dict() for doc in changed['trips']},
+        'alerts': [{**doc.to_dict(), 'id': doc.id} for doc in changed['alerts']],
+        'deleted': deleted,
+        'serverTime': server_time,
+    }
+
+
+def apply_delta(cached, delta):
+    """
+    Wendet ein Ergebnis von load_user_data auf einen vorhandenen Stand {'trips': {...}, 'alerts': [...]} an
+    (bei einem vollständigen Abruf wird der Stand ersetzt).
+    """
+    if delta['full'] or cached is None:
+        return {'trips': dict(delta['trips']), 'alerts': list(delta['alerts'])}
+
+    trips = {**cached['trips'], **delta['trips']}
+    for doc_id in delta['deleted']['trips']:
+        trips.pop(doc_id, None)
+
+    alerts = {str(alert.get('id')): alert for alert in cached['alerts']}
+    alerts.update({alert['id']: alert for alert in delta['alerts']})
+    for doc_id in delta['deleted']['alerts']:
+        alerts.pop(doc_id, None)
+
+    return {'trips': trips, 'alerts': list(alerts.values())}
+
+
+def _prune_tombstones(user_ref, before):
+    """Entfernt Grabsteine, die älter als die Aufbewahrungszeit sind"""
+    try:
+        for doc in user_ref.collection(TOMBSTONES).where('updatedAt', '<', before).stream():
+            doc.reference.delete()
+    except Exception as e:
+        print(f"⚠️ Alte Grabsteine konnten nicht entfernt werden: {e}")
@@ -7,8 +7,6 @@ import os
 import json
 import datetime
 import threading
-import airportsdata
-import re
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from PySide6.QtCore import QUrl, QStandardPaths, Slot, QObject, Signal, QThread
 from PySide6.QtGui import QIcon
@@ -17,38 +15,25 @@ from PySide6.QtWidgets import QApplication, QMainWindow
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebChannel import QWebChannel
 
-# Firebase Admin SDK
-import firebase_admin
-from firebase_admin import credentials, firestore
+# Firebase Admin SDK bzw. lokale Speicher-Backends
+from storage import open_storage
 
 # Deine Flug-Bibliothek
-from fast_flights import FlightData, Passengers, get_flights, search_airport
-
-# Hilfsfunktion zum Bereinigen von Preisen
-def clean_price(price_value):
-    """
-    Konvertiert Preiswerte zu float, entfernt €-Zeichen, Kommas, etc.
-    Beispiele: '€1024' -> 1024.0, '1,234.56' -> 1234.56, '1024' -> 1024.0
-    """
-    if price_value is None:
-        return None
-
-    # Falls bereits eine Zahl, direkt zurückgeben
-    if isinstance(price_value, (int, float)):
-        return float(price_value)
-
-    # String-Verarbeitung
-    if isinstance(price_value, str):
-        # Entferne Währungssymbole und Leerzeichen
-        cleaned = re.sub(r'[€$£¥\s]', '', price_value)
-        # Entferne Tausendertrennzeichen (Komma)
-        cleaned = cleaned.replace(',', '')
-        try:
-            return float(cleaned)
-        except (ValueError, TypeError):
-            return None
-
-    return None
+from flight_cache import passenger_key
+from flight_history import flight_history
+from alert_scheduler import AlertScheduler
+from browser_pool import browser_pool
+from price_calendar import build_price_calendar, date_window
+from itinerary_search import search_itinerary, trip_legs
+from airport_index import get_airport_index
+from airport_store import airport_store
+from airport_geo import nearby_airports
+from flight_results import result_options
+from local_store import LocalStore
+from write_queue import WriteBehindQueue
+from data_sync import TOMBSTONES, apply_delta, load_user_data, stamp, tombstone, tombstone_id
+from search_engine import (airport_coords, alert_route_key, apply_alert_price, build_passengers, check_alert_route,
+                           clean_price, resolve_iata, search_flights)
 
 # --- Http-Server für die Authentifizierung ---
 class TravelFolioHTTPHandler(SimpleHTTPRequestHandler):
@@ -69,14 +54,9 @@ def start_simple_http_server(port=5555):
     return server
 
 # --- FIREBASE INITIALISIERUNG ---
-cred_path = "./firebase-key/travel-e75e6-firebase-adminsdk-fbsvc-7ba67c5552.json"
-if os.path.exists(cred_path):
-    cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-else:
-    print(f"WARNUNG: Firebase Key nicht gefunden unter {cred_path}")
-    db = None
+# Firestore, wenn der Schlüssel vorhanden ist; ohne Schlüssel bleibt die App im lokalen Modus,
+# außer TRAVELFOLIO_STORAGE=memory|sqlite ist gesetzt (siehe storage.py)
+db = open_storage()
 
 
 
@@ -93,7 +73,11 @@ class PriceAlertChecker(QThread):
         super().__init__()
         self.bridge = bridge
         self.running = True
-        self.check_interval = 3600  # 1 Stunde in Sekunden
+        self.check_interval = 3600  # Max. Wartezeit in Sekunden (neue Alerts werden spätestens dann erfasst)
+        self.min_sleep = 300  # Min. Wartezeit in Sekunden
+
+        # Fälligkeiten pro Alert, bleiben über Neustarts erhalten
+        self.scheduler = AlertScheduler(os.path.join(bridge.data_dir, "alert_schedule.json"))
 
     def run(self):
         while self.running:
@@ -103,14 +87,15 @@ class PriceAlertChecker(QThread):
             except Exception as e:
                 print(f"❌ Fehler im Preisalarm-Checker: {e}")
 
-            # Warte bis zur nächsten Überprüfung
-            for _ in range(self.check_interval):
+            # Warte bis zum nächsten fälligen Alert
+            wait = int(self.scheduler.seconds_until_next(self.min_sleep, self.check_interval))
+            for _ in range(wait):
                 if not self.running:
                     break
                 self.msleep(1000)  # 1 Sekunde
 
     def check_all_alerts(self):
-        """Überprüft alle Alerts des aktuellen Users"""
+        """Überprüft alle fälligen Alerts des aktuellen Users"""
         if not db or not self.bridge.current_uid:
             return
 
@@ -120,29 +105,41 @@ class PriceAlertChecker(QThread):
 
             alerts = user_ref.collection('alerts').stream()
 
+            seen_ids = []
             for alert_doc in alerts:
                 if not self.running:
                     break
 
+                seen_ids.append(alert_doc.id)
+                if not self.scheduler.is_due(alert_doc.id):
+                    continue
+
                 alert_data = alert_doc.to_dict()
-                self.check_single_alert(alert_doc, alert_data)
+                current_price = self.check_single_alert(alert_doc, alert_data)
+
+                # Nächste Prüfung einplanen (abhängig von Abflugdatum und Preisschwankung)
+                search_date = alert_route_key(alert_data)[2]
+                self.scheduler.record(alert_doc.id, search_date, current_price)
+
+            if self.running:
+                self.scheduler.retain(seen_ids)
+            self.scheduler.save()
 
         except Exception as e:
             print(f"Fehler beim Laden der Alerts: {e}")
 
     def check_single_alert(self, alert_doc, alert_data):
-        """Überprüft einen einzelnen Preisalarm"""
+        """Überprüft einen einzelnen Preisalarm und gibt den gefundenen Preis zurück (oder None)"""
         dest = alert_data.get('dest')
         target_price = alert_data.get('targetPrice')
         last_seen_price = alert_data.get('lastSeenPrice')
-        notified_at = alert_data.get('notifiedAt')
-        origin = alert_data.get('origin', 'FRA')
-
-        print(f"\n   📋 Desktop: Prüfe Alert {origin} → {dest}")
 
         if not dest or not target_price:
             return
 
+        origin, dest, search_date = alert_route_key(alert_data)
+        print(f"\n   📋 Desktop: Prüfe Alert {origin} → {dest} am {search_date}")
+
         # Konvertiere zu float mit Bereinigung
         target_price = clean_price(target_price)
         last_seen_price = clean_price(last_seen_price)
@@ -155,73 +152,30 @@ class PriceAlertChecker(QThread):
             return
 
         try:
-            # Datum: Verwende gespeichertes Datum oder morgen als Fallback
-            saved_date = alert_data.get('date')
-            if saved_date:
-                search_date = saved_date
-                print(f"      → Verwende gespeichertes Datum: {search_date}")
-            else:
-                search_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-                print(f"      → Kein Datum gespeichert, verwende morgen: {search_date}")
-
-            print(f"      → Suche Flüge: {origin} → {dest} am {search_date}")
-
-            # Flugsuche
-            flight_data = [FlightData(date=search_date, from_airport=origin, to_airport=dest)]
-            passengers = Passengers(adults=1, children=0, infants_in_seat=0, infants_on_lap=0)
-
-            result = get_flights(
-                flight_data=flight_data,
-                trip="one-way",
-                seat="economy",
-                passengers=passengers,
-                fetch_mode="local"
-            )
-
-            if result and result.flights and len(result.flights) > 0:
-                cheapest = min(result.flights, key=lambda f: clean_price(f.price) or float('inf'))
-                current_price = clean_price(cheapest.price)
-
-                print(f"      → API Rohdaten: {cheapest.price}")
-                print(f"      → Bereinigter Preis: {current_price}€")
-
-                if current_price is None:
-                    print(f"   ⚠️ Ungültiger Preis von API für {dest}")
-                    return
-
-                # Aktualisiere lastSeenPrice
-                update_data = {'lastSeenPrice': current_price}
-
-                # Prüfe, ob Alarm ausgelöst werden soll
-                if current_price <= target_price:
-                    should_notify = False
-                    if not notified_at:
-                        should_notify = True
-                    elif last_seen_price is not None and last_seen_price > target_price:
-                        should_notify = True
-
-                    if should_notify:
-                        update_data['notifiedAt'] = datetime.datetime.now().timestamp()
-                        update_data['triggeredPrice'] = current_price
-                        print(f"   ✅ Preisalarm ausgelöst: {dest} @ {current_price}€ (Ziel: {target_price}€)")
-
-                        # Sende Signal an UI
-                        self.alertTriggered.emit({
-                            'dest': dest,
-                            'currentPrice': current_price,
-                            'targetPrice': target_price,
-                            'id': alert_doc.id
-                        })
-                else:
-                    # Preis über Ziel - reset notifiedAt
-                    if notified_at and last_seen_price is not None and last_seen_price <= target_price:
-                        update_data['notifiedAt'] = None
-
-                # Speichere Aktualisierung
-                alert_doc.reference.update(update_data)
+            current_price = check_alert_route(origin, dest, search_date)
+            if current_price is None:
+                print(f"   ⚠️ Kein gültiger Preis für {origin} → {dest}")
+                return None
+
+            print(f"      → Günstigster Preis: {current_price}€")
+
+            status, update_data = apply_alert_price(self.bridge.current_uid, alert_data, current_price)
+            if status == 'triggered':
+                # Sende Signal an UI
+                self.alertTriggered.emit({
+                    'dest': dest,
+                    'currentPrice': current_price,
+                    'targetPrice': target_price,
+                    'id': alert_doc.id
+                })
+
+            # Speichere Aktualisierung
+            alert_doc.reference.update(stamp(update_data))
+            return current_price
 
         except Exception as e:
             print(f"   ⚠️ Fehler bei Preischeck für {dest}: {e}")
+        return None
 
     def stop(self):
         """Stoppt den Checker-Thread"""
@@ -231,84 +185,55 @@ class PriceAlertChecker(QThread):
 class SearchWorker(QThread):
     finished = Signal(dict)
 
-    def __init__(self, origin, destination, date, pass_data, airports_db):
+    def __init__(self, origin, destination, date, pass_data, options=None):
         super().__init__()
         self.origin = origin
         self.destination = destination
         self.date = date
         self.pass_data = pass_data
-        self.airports_db = airports_db
+        self.options = options  # Filter/Sortierung aus result_options()
 
     def run(self):
         try:
             print(f"Suche gestartet: {self.origin} -> {self.destination} am {self.date}")
-
-            passengers = Passengers(
-                adults=int(self.pass_data.get('adults', 1)),
-                children=int(self.pass_data.get('children', 0)),
-                infants_in_seat=int(self.pass_data.get('infants', 0)),
-                infants_on_lap=0
-            )
-
-            current_origin = self.origin
-            if len(current_origin) != 3:
-                res = search_airport(current_origin)
-                if res:
-                    current_origin = res[0].value if hasattr(res[0], 'value') else res[0]
-
-            current_dest = self.destination
-            if len(current_dest) != 3:
-                res = search_airport(current_dest)
-                if res:
-                    current_dest = res[0].value if hasattr(res[0], 'value') else res[0]
-
-            flight_data = [FlightData(
-                date=self.date,
-                from_airport=current_origin,
-                to_airport=current_dest
-            )]
-
-            result = get_flights(
-                flight_data=flight_data,
-                trip="one-way",
-                seat="economy",
-                passengers=passengers,
-                fetch_mode="local"
-            )
-
-            flights_list = []
-            if result and result.flights:
-                for flight in result.flights:
-                    flights_list.append({
-                        'airline': flight.name,
-                        'price': flight.price,
-                        'departure': flight.departure,
-                        'arrival': flight.arrival,
-                        'duration': flight.duration,
-                        'stops': flight.stops,
-                    })
-            # Flughafen-Koordinaten holen
-            coords = {}
-
-            if current_origin in self.airports_db:
-                apt = self.airports_db[current_origin]
-                coords[current_origin] = {'lat': apt['lat'], 'lon': apt['lon']}
-
-            if current_dest in self.airports_db:
-                apt = self.airports_db[current_dest]
-                coords[current_dest] = {'lat': apt['lat'], 'lon': apt['lon']}
-
-            print(f" Koordinaten gefunden für: {list(coords.keys())}")
-
+            result = search_flights(self.origin, self.destination, self.date, self.pass_data, self.options)
+            print(f" Koordinaten gefunden für: {list(result['coords'].keys())}")
+            self.finished.emit(result)
+        except Exception as e:
+            print(f"Suche fehlgeschlagen: {str(e)}")
             self.finished.emit({
-                'success': True,
-                'origin': current_origin,
-                'destination': current_dest,
-                'flights': flights_list,
-                'coords': coords
+                'success': False,
+                'error': str(e),
+                'origin': self.origin,
+                'destination': self.destination
             })
+
+
+class RangeSearchWorker(QThread):
+    """Flexible Datumssuche (Preis-Kalender) im Hintergrund"""
+    finished = Signal(dict)
+
+    def __init__(self, origin, destination, window, pass_data):
+        super().__init__()
+        self.origin = origin
+        self.destination = destination
+        self.window = window
+        self.pass_data = pass_data
+
+    def run(self):
+        try:
+            dates = date_window(self.window)
+            print(f"Kalender-Suche gestartet: {self.origin} -> {self.destination} ({len(dates)} Tage)")
+
+            current_origin = resolve_iata(self.origin)
+            current_dest = resolve_iata(self.destination)
+
+            result = build_price_calendar(current_origin, current_dest, dates, build_passengers(self.pass_data))
+            result['coords'] = airport_coords(current_origin, current_dest)
+
+            self.finished.emit(result)
         except Exception as e:
-            print(f"Suche fehlgeschlagen: {str(e)}")
+            print(f"Kalender-Suche fehlgeschlagen: {str(e)}")
             self.finished.emit({
                 'success': False,
                 'error': str(e),
@@ -317,10 +242,38 @@ class SearchWorker(QThread):
             })
 
 
+class TripSearchWorker(QThread):
+    """Hin-/Rückflug oder Gabelflug im Hintergrund"""
+    finished = Signal(dict)
+
+    def __init__(self, request_data):
+        super().__init__()
+        self.request_data = request_data
+
+    def run(self):
+        trip = self.request_data.get('trip', 'round-trip')
+        try:
+            legs = trip_legs(trip, self.request_data)
+            print(f"Reise-Suche gestartet ({trip}): {' / '.join(f'{o} -> {d} am {t}' for o, d, t in legs)}")
+
+            passengers = build_passengers(self.request_data.get('passengers', {}))
+            resolved = [(resolve_iata(origin), resolve_iata(dest), date) for origin, dest, date in legs]
+
+            options = result_options(self.request_data)
+            result = search_itinerary(trip, resolved, passengers, filters=options['filters'] if options else None)
+            result['coords'] = airport_coords(*{code for leg in resolved for code in leg[:2]})
+
+            self.finished.emit(result)
+        except Exception as e:
+            print(f"Reise-Suche fehlgeschlagen: {str(e)}")
+            self.finished.emit({'success': False, 'error': str(e), 'trip': trip})
+
+
 # --- BRIDGE ---
 # Hier werden alle API-Calls vom Frontend zum Backend gemacht, bloß dass es in PySide6 ist
 class Bridge(QObject):
     resultsReady = Signal(dict)
+    rangeResultsReady = Signal(dict)  # Signal für den Preis-Kalender
     dataLoaded = Signal(dict)
     alertChecked = Signal(dict)  # Signal für Preisalarm-Updates
 
@@ -329,21 +282,30 @@ class Bridge(QObject):
         self.current_uid = None
         self.app_id = "travelfolio-3d-001"
 
-        #Flugdatenbank
-        print("Lade Flughafendatenbank...")
-        self.airports = airportsdata.load('IATA')
-        print(f" Datenbank geladen ({len(self.airports)} Flughäfen)")
+        # Flugdatenbank (gemeinsame, kompakte Instanz - wird erst beim ersten Zugriff geladen)
+        self.airports = airport_store
 
         # Lokaler Datenpfad
         self.data_dir = os.path.join(os.path.expanduser("~"), ".travelfolio")
         os.makedirs(self.data_dir, exist_ok=True)
 
+        # Lokale Trips/Alerts (ohne Login), übernimmt beim ersten Start die alten JSON-Dateien
+        self.local_store = LocalStore(os.path.join(self.data_dir, "travelfolio.sqlite3"))
+
+        # Firestore-Schreibvorgänge laufen über eine Queue im Hintergrund (offline werden sie vorgemerkt)
+        self.write_queue = WriteBehindQueue(self.local_store, db).start() if db else None
+        # Zuletzt geladener Stand pro User, danach werden nur noch Änderungen abgefragt
+        self._synced = {}  # uid -> (daten, serverTime)
+
         # Session-Datei für persistente UID
         self.session_file = os.path.join(self.data_dir, "session.json")
 
         # Lade gespeicherte Session beim Start
         self._load_saved_session()
 
+        # Browser-Pool im Hintergrund vorwärmen (erste Suche ohne Kaltstart)
+        browser_pool.warm_up()
+
         # Preisalarm-Checker initialisieren
         self.price_checker = None
         if db:
@@ -413,23 +375,86 @@ class Bridge(QObject):
 
     @Slot(str, str, str, dict)
     def search_flights(self, origin, destination, date, pass_data):
-        self.worker = SearchWorker(origin.upper(), destination.upper(), date, pass_data, self.airports)
+        self.worker = SearchWorker(origin.upper(), destination.upper(), date, pass_data)
         self.worker.finished.connect(self.resultsReady.emit)
         self.worker.start()
 
+    @Slot(str, result=list)
+    def suggest_airports(self, query):
+        """Autocomplete für Flughäfen (IATA, ICAO, Name, Stadt, Land - tippfehlertolerant)"""
+        return get_airport_index().suggest(query, limit=8)
+
+    @Slot(list, result=dict)
+    def get_airport_coords(self, codes):
+        """Koordinaten für den Globus {iata: {'lat': ..., 'lon': ...}}"""
+        return airport_coords(*(str(code).upper() for code in codes))
+
+    @Slot(float, float, int, float, result=list)
+    def get_nearby_airports(self, lat, lon, k, radius_km):
+        """Nächste k Flughäfen zu einem Punkt (z.B. Klick auf den Globus), radius_km = 0 für unbegrenzt"""
+        return nearby_airports(lat, lon, k=k or 5, radius_km=radius_km or None)
+
+    @Slot(str, str, str, dict, result=list)
+    def get_price_trend(self, origin, destination, date, pass_data):
+        """Preisverlauf einer Route aus der lokalen Flug-Historie (ohne neuen Scrape)"""
+        if not flight_history:
+            return []
+        return flight_history.price_trend(origin, destination, date,
+                                          passengers=passenger_key(build_passengers(pass_data)))
+
+    @Slot(dict)
+    def search_trip(self, request_data):
+        """
+        Suche im gleichen Format wie der Body von /api/search: One-Way, Hin-/Rückflug oder Gabelflug,
+        optional mit "filters" und "sort" (serverseitig gefiltert/sortiert)
+        """
+        if request_data.get('trip', 'one-way') == 'one-way':
+            try:
+                options = result_options(request_data)
+            except (TypeError, ValueError) as e:
+                self.resultsReady.emit({'success': False, 'error': str(e)})
+                return
+            self.worker = SearchWorker(str(request_data.get('origin', '')).upper(),
+                                       str(request_data.get('destination', '')).upper(),
+                                       request_data.get('date', ''), request_data.get('passengers', {}), options)
+            self.worker.finished.connect(self.resultsReady.emit)
+            self.worker.start()
+            return
+        self.trip_worker = TripSearchWorker(request_data)
+        self.trip_worker.finished.connect(self.resultsReady.emit)
+        self.trip_worker.start()
+
+    @Slot(str, str, dict, dict)
+    def search_flights_range(self, origin, destination, window, pass_data):
+        """Preis-Kalender für ein Datumsfenster (date & flex, start & end oder month)"""
+        self.range_worker = RangeSearchWorker(origin.upper(), destination.upper(), window, pass_data)
+        self.range_worker.finished.connect(self.rangeResultsReady.emit)
+        self.range_worker.start()
+
+    @Slot(dict, str, result=dict)
+    def get_alert_history(self, alert_data, resolution):
+        """Preisverlauf eines Alerts für das Diagramm (resolution: raw, hour, 6h, day, week, Sekunden oder leer)"""
+        if not flight_history or not alert_data.get('dest'):
+            return {'resolution': 0, 'rawPoints': 0, 'points': []}
+        origin, dest, search_date = alert_route_key(alert_data)
+        try:
+            return flight_history.price_series(origin, dest, search_date, resolution=resolution or None)
+        except ValueError:
+            return {'resolution': 0, 'rawPoints': 0, 'points': [], 'error': 'Ungültige Auflösung'}
+
     @Slot(dict)
     def check_alert_price(self, alert_data):
         """Überprüft einen einzelnen Preisalarm manuell"""
         try:
             dest = alert_data.get('dest')
             target_price = alert_data.get('targetPrice')
-            origin = alert_data.get('origin', 'FRA')
-
-            print(f"🔍 Desktop: Manuelle Prüfung {origin} → {dest}")
 
             if not dest or not target_price:
                 return
 
+            origin, dest, search_date = alert_route_key(alert_data)
+            print(f"🔍 Desktop: Manuelle Prüfung {origin} → {dest} am {search_date}")
+
             # Konvertiere zu float mit Bereinigung
             target_price = clean_price(target_price)
             print(f"   → Zielpreis: {target_price}€")
@@ -437,49 +462,21 @@ class Bridge(QObject):
             if target_price is None:
                 return
 
-            # Datum: Verwende gespeichertes Datum oder morgen als Fallback
-            saved_date = alert_data.get('date')
-            if saved_date:
-                search_date = saved_date
-                print(f"   → Verwende gespeichertes Datum: {search_date}")
-            else:
-                search_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-                print(f"   → Kein Datum gespeichert, verwende morgen: {search_date}")
-
-            print(f"   → Suche Flüge: {origin} → {dest} am {search_date}")
-
-            # Flugsuche
-            flight_data = [FlightData(date=search_date, from_airport=origin, to_airport=dest)]
-            passengers = Passengers(adults=1, children=0, infants_in_seat=0, infants_on_lap=0)
-
-            result = get_flights(
-                flight_data=flight_data,
-                trip="one-way",
-                seat="economy",
-                passengers=passengers,
-                fetch_mode="local"
-            )
-
-            if result and result.flights and len(result.flights) > 0:
-                cheapest = min(result.flights, key=lambda f: clean_price(f.price) or float('inf'))
-                current_price = clean_price(cheapest.price)
-
-                print(f"   → Gefundener Preis: {current_price}€")
-
-                if current_price is None:
-                    return
+            current_price = check_alert_route(origin, dest, search_date)
+            if current_price is None:
+                print(f"   ⚠️ Keine Flüge gefunden für {origin} → {dest}")
+                return
 
-                print(f"   → Sende Signal an Frontend: triggered={current_price <= target_price}")
+            print(f"   → Gefundener Preis: {current_price}€")
+            print(f"   → Sende Signal an Frontend: triggered={current_price <= target_price}")
 
-                self.alertChecked.emit({
-                    'id': alert_data.get('id'),
-                    'dest': dest,
-                    'currentPrice': current_price,
-                    'targetPrice': target_price,
-                    'triggered': current_price <= target_price
-                })
-            else:
-                print(f"   ⚠️ Keine Flüge gefunden für {origin} → {dest}")
+            self.alertChecked.emit({
+                'id': alert_data.get('id'),
+                'dest': dest,
+                'currentPrice': current_price,
+                'targetPrice': target_price,
+                'triggered': current_price <= target_price
+            })
         except Exception as e:
             print(f"   ❌ Fehler beim Alert-Check: {e}")
 
@@ -503,29 +500,63 @@ class Bridge(QObject):
         try:
             user_ref = db.collection('artifacts').document(self.app_id).collection('users').document(self.current_uid)
 
-            trips = {doc.id: doc.to_dict() for doc in user_ref.collection('trips').stream()}
+            # Nach dem ersten Laden nur noch Änderungen seit dem letzten Abruf lesen
+            cached, since = self._synced.get(self.current_uid, (None, None))
+            delta = load_user_data(user_ref, since)
+            data = apply_delta(cached, delta)
+            self._synced[self.current_uid] = (data, delta['serverTime'])
 
-            alerts = []
-            for doc in user_ref.collection('alerts').stream():
-                alert_data = doc.to_dict()
-                alert_data['id'] = doc.id
-                alerts.append(alert_data)
+            trips, alerts = self._apply_pending_writes(dict(data['trips']), list(data['alerts']))
 
-            print(f"☁️ Daten aus Firestore geladen für {self.current_uid}: {len(trips)} Trips")
+            if delta['full']:
+                print(f"☁️ Daten aus Firestore geladen für {self.current_uid}: {len(trips)} Trips")
+            else:
+                print(f"☁️ Änderungen aus Firestore geladen für {self.current_uid}: {len(delta['trips'])} Trips, "
+                      f"{len(delta['alerts'])} Alerts geändert")
             self.dataLoaded.emit({'trips': trips, 'alerts': alerts})
         except Exception as e:
             print(f"Firestore Load Error: {e}")
             self._load_local_data()
 
+    def _user_path(self):
+        """Firestore-Pfad des eingeloggten Users (für die Write-Behind-Queue)"""
+        return f"artifacts/{self.app_id}/users/{self.current_uid}"
+
+    def _apply_pending_writes(self, trips, alerts):
+        """Ergänzt die aus Firestore geladenen Daten um noch nicht geschriebene Änderungen"""
+        prefix = self._user_path() + '/'
+        pending = self.write_queue.pending(prefix=prefix)
+        if not pending:
+            return trips, alerts
+
+        alerts_by_id = {alert['id']: alert for alert in alerts}
+        for path, (op, data) in pending.items():
+            collection, _, doc_id = path[len(prefix):].partition('/')
+            target = trips if collection == 'trips' else alerts_by_id if collection == 'alerts' else None
+            if target is None:
+                continue
+            if op == 'delete':
+                target.pop(doc_id, None)
+            elif collection == 'alerts':
+                target[doc_id] = {**data, 'id': doc_id}
+            else:
+                target[doc_id] = data
+        print(f"📤 {len(pending)} ausstehende Änderungen berücksichtigt")
+        return trips, list(alerts_by_id.values())
+
+    def _queue_delete(self, kind, doc_id):
+        """Löschen plus Grabstein (damit andere Geräte das Löschen beim Delta-Abruf sehen)"""
+        self.write_queue.delete(f"{self._user_path()}/{kind}/{doc_id}")
+        self.write_queue.set(f"{self._user_path()}/{TOMBSTONES}/{tombstone_id(kind, doc_id)}",
+                             tombstone(kind, doc_id))
+
     @Slot(str, dict)
     def save_trip(self, trip_id, trip_data):
         if not db or not self.current_uid:
             return self._save_local_trip(trip_id, trip_data)
 
         try:
-            doc_ref = db.collection('artifacts').document(self.app_id).collection('users').document(
-                self.current_uid).collection('trips').document(trip_id)
-            doc_ref.set(trip_data)
+            self.write_queue.set(f"{self._user_path()}/trips/{trip_id}", trip_data)
             return True
         except Exception as e:
             print(f"Firestore Save Trip Error: {e}")
@@ -537,9 +568,7 @@ class Bridge(QObject):
             return self._delete_local_trip(trip_id)
 
         try:
-            doc_ref = db.collection('artifacts').document(self.app_id).collection('users').document(
-                self.current_uid).collection('trips').document(trip_id)
-            doc_ref.delete()
+            self._queue_delete('trips', trip_id)
             return True
         except Exception as e:
             print(f"Firestore Delete Trip Error: {e}")
@@ -560,10 +589,8 @@ class Bridge(QObject):
 
         try:
             alert_id = str(alert_data.get('id', datetime.datetime.now().timestamp()))
-            doc_ref = db.collection('artifacts').document(self.app_id).collection('users').document(
-                self.current_uid).collection('alerts').document(alert_id)
-            doc_ref.set(alert_data)
-            print(f"   ✅ Alert gespeichert in Firestore")
+            self.write_queue.set(f"{self._user_path()}/alerts/{alert_id}", alert_data)
+            print(f"   ✅ Alert vorgemerkt für Firestore")
             return True
         except Exception as e:
             print(f"   ❌ Firestore Save Alert Error: {e}")
@@ -574,69 +601,33 @@ class Bridge(QObject):
         if not db or not self.current_uid:
             return self._delete_local_alert(alert_id)
         try:
-            doc_ref = db.collection('artifacts').document(self.app_id).collection('users').document(
-                self.current_uid).collection('alerts').document(alert_id)
-            doc_ref.delete()
+            self._queue_delete('alerts', alert_id)
             return True
         except Exception as e:
             print(f"Firestore Delete Alert Error: {e}")
             return False
 
+    def shutdown(self):
+        """Beim Beenden: ausstehende Firestore-Änderungen noch kurz versuchen zu schreiben"""
+        if self.write_queue and not self.write_queue.stop(timeout=5.0):
+            print("📤 Firestore nicht erreichbar - Änderungen werden beim nächsten Start geschrieben")
+
     # --- INTERNE HILFSMETHODEN FÜR LOKALEN FALLBACK ---
 
     def _load_local_data(self):
-        trips_path = os.path.join(self.data_dir, "trips.json")
-        alerts_path = os.path.join(self.data_dir, "alerts.json")
-        trips = {}
-        alerts = []
-        if os.path.exists(trips_path):
-            with open(trips_path, 'r') as f: trips = json.load(f)
-        if os.path.exists(alerts_path):
-            with open(alerts_path, 'r') as f: alerts = json.load(f)
-        self.dataLoaded.emit({'trips': trips, 'alerts': alerts})
+        self.dataLoaded.emit(self.local_store.load())
 
     def _save_local_trip(self, trip_id, trip_data):
-        path = os.path.join(self.data_dir, "trips.json")
-        data = {}
-        if os.path.exists(path):
-            with open(path, 'r') as f: data = json.load(f)
-        data[trip_id] = trip_data
-        with open(path, 'w') as f: json.dump(data, f, indent=2)
-        return True
+        return self.local_store.put('trips', trip_id, trip_data)
 
     def _delete_local_trip(self, trip_id):
-        path = os.path.join(self.data_dir, "trips.json")
-        if not os.path.exists(path): return False
-        with open(path, 'r') as f:
-            data = json.load(f)
-        if trip_id in data:
-            del data[trip_id]
-            with open(path, 'w') as f: json.dump(data, f, indent=2)
-        return True
+        return self.local_store.delete('trips', trip_id)
 
     def _save_local_alert(self, alert_id, alert_data):
-        path = os.path.join(self.data_dir, "alerts.json")
-        data = []
-        if os.path.exists(path):
-            with open(path, 'r') as f: data = json.load(f)
-        # Füge neuen Alert hinzu oder aktualisiere bestehenden
-        existing_index = next((i for i, a in enumerate(data) if a.get('id') == alert_id), None)
-        if existing_index is not None:
-            data[existing_index] = alert_data
-        else:
-            data.append(alert_data)
-        with open(path, 'w') as f: json.dump(data, f, indent=2)
-        return True
+        return self.local_store.put('alerts', alert_id, alert_data)
 
     def _delete_local_alert(self, alert_id):
-        path = os.path.join(self.data_dir, "alerts.json")
-        if not os.path.exists(path): return False
-        with open(path, 'r') as f:
-            data = json.load(f)
-        # Filtere den Alert heraus
-        data = [a for a in data if a.get('id') != alert_id]
-        with open(path, 'w') as f: json.dump(data, f, indent=2)
-        return True
+        return self.local_store.delete('alerts', alert_id)
 
 
 class PopupWindow(QMainWindow):
@@ -747,6 +738,9 @@ if __name__ == "__main__":
     window = TravelFolioApp()
     window.show()
 
+    # Ausstehende Firestore-Änderungen vor dem Beenden schreiben
+    app.aboutToQuit.connect(window.bridge.shutdown)
+
     print("App gestartet")
 
     sys.exit(app.exec())
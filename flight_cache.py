@@ -0,0 +1,222 @@
+# Gemeinsamer Ergebnis-Cache für Flugsuchen (Web-API und Desktop-App)
+# Identische Suchen (gleiche Route, Datum, Passagiere) werden für eine gewisse Zeit
+# direkt aus dem Speicher beantwortet, statt jedes Mal einen neuen Playwright-Scrape zu starten.
+# Jeder Scrape wird zusätzlich in der Flug-Historie (flight_history.py) abgelegt, die nach einem
+# Neustart ebenfalls noch frische Ergebnisse liefern kann.
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from browser_pool import pooled_get_flights
+from flight_history import flight_history
+
+# Marker für "nicht im Cache" (None könnte theoretisch ein gültiger Wert sein)
+_MISSING = object()
+
+
+class FlightCache:
+    """Thread-sicherer Cache mit Ablaufzeit (TTL) und LRU-Verdrängung"""
+
+    def __init__(self, ttl=600, max_size=256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Gibt den gecachten Wert zurück oder `default`, falls nicht vorhanden/abgelaufen"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                # Abgelaufen - Eintrag entfernen
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            # Als zuletzt benutzt markieren
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Speichert einen Wert und verdrängt bei Bedarf die ältesten Einträge"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/Miss-Zähler für Monitoring"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / total, 3) if total else 0.0,
+                'size': len(self._entries),
+                'maxSize': self.max_size,
+                'ttl': self.ttl,
+            }
+
+
+class _InFlightCall:
+    """Ein laufender Aufruf, auf den weitere Anfragen warten können"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Bündelt gleichzeitige identische Anfragen (Request Coalescing).
+    Der erste Aufrufer führt die Funktion aus, alle weiteren mit demselben Schlüssel
+    warten auf dessen Ergebnis, statt selbst einen Scrape zu starten.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> _InFlightCall
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            # Auf den laufenden Aufruf warten und dessen Ergebnis übernehmen
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+def make_search_key(flight_data, trip, seat, passengers, fetch_mode):
+    """
+    Normalisierter Schlüssel für eine Flugsuche.
+    Beispiel: ('one-way', 'economy', 'local', (1, 0, 0, 0), (('2025-06-01', 'FRA', 'JFK', None),))
+    """
+    legs = tuple(
+        (
+            str(leg.date).strip(),
+            str(leg.from_airport).strip().upper(),
+            str(leg.to_airport).strip().upper(),
+            getattr(leg, 'max_stops', None),
+        )
+        for leg in flight_data
+    )
+    return (trip, seat, fetch_mode, passenger_key(passengers), legs)
+
+
+def passenger_key(passengers):
+    """(Erwachsene, Kinder, Kleinkinder mit Sitz, Kleinkinder auf dem Schoß) eines Passengers-Objekts"""
+    # fast_flights.Passengers hat keine Attribute wie .adults, die Anzahlen stehen nur als Tupel in `_data`.
+    # Ein Fallback auf Standardwerte würde alle Passagier-Kombinationen auf (1, 0, 0, 0) abbilden.
+    if passengers is None:
+        return (1, 0, 0, 0)
+    return tuple(int(n) for n in passengers._data)
+
+
+# Globale Instanz, die von allen Suchpfaden geteilt wird
+# Konfigurierbar über Umgebungsvariablen (TTL in Sekunden)
+flight_cache = FlightCache(
+    ttl=int(os.environ.get('TRAVELFOLIO_CACHE_TTL', 600)),
+    max_size=int(os.environ.get('TRAVELFOLIO_CACHE_SIZE', 256)),
+)
+search_flight = SingleFlight()
+
+# Wie alt ein Ergebnis aus der Flug-Historie höchstens sein darf, um eine Suche zu beantworten
+HISTORY_MAX_AGE = int(os.environ.get('TRAVELFOLIO_HISTORY_MAX_AGE', flight_cache.ttl))
+
+
+def _fetch_and_store(key, flight_data, trip, seat, passengers, fetch_mode, before_scrape=None):
+    """
+    Führt den eigentlichen Scrape aus (maximal einmal gleichzeitig pro Schlüssel).
+    `before_scrape` wird nur direkt vor einem echten Scrape aufgerufen (z.B. für ein Rate-Limit).
+    """
+    def fetch():
+        if before_scrape:
+            before_scrape()
+        result = pooled_get_flights(
+            flight_data=flight_data,
+            trip=trip,
+            seat=seat,
+            passengers=passengers,
+            fetch_mode=fetch_mode
+        )
+        flight_cache.set(key, result)
+        if flight_history:
+            try:
+                flight_history.record(key, result)
+            except Exception as e:
+                print(f"⚠️ Flug-Historie konnte nicht gespeichert werden: {e}")
+        return result
+
+    return search_flight.do(key, fetch)
+
+
+def cached_get_flights(*, flight_data, trip, seat, passengers, fetch_mode="local", before_scrape=None):
+    """Wie `get_flights`, aber identische Suchen werden aus dem Cache beantwortet"""
+    key = make_search_key(flight_data, trip, seat, passengers, fetch_mode)
+
+    result = flight_cache.get(key, _MISSING)
+    if result is not _MISSING:
+        print(f"⚡ Cache-Treffer für {key[4]}")
+        return result
+
+    if flight_history and HISTORY_MAX_AGE > 0:
+        try:
+            result = flight_history.latest(key, HISTORY_MAX_AGE)
+        except Exception as e:
+            print(f"⚠️ Flug-Historie nicht lesbar: {e}")
+            result = None
+        if result is not None:
+            print(f"🗄️ Historie-Treffer für {key[4]}")
+            return result
+
+    return _fetch_and_store(key, flight_data, trip, seat, passengers, fetch_mode, before_scrape)
+
+
+def coalesced_get_flights(*, flight_data, trip, seat, passengers, fetch_mode="local", before_scrape=None):
+    """
+    Wie `get_flights`, ohne Cache-Abfrage (immer aktueller Preis, z.B. für Preisalarme),
+    aber gleichzeitige identische Suchen teilen sich einen Scrape.
+    Das Ergebnis landet trotzdem im Cache, damit spätere Suchen davon profitieren.
+    """
+    key = make_search_key(flight_data, trip, seat, passengers, fetch_mode)
+    return _fetch_and_store(key, flight_data, trip, seat, passengers, fetch_mode, before_scrape)
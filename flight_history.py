@@ -0,0 +1,231 @@
+# Dauerhafte Flug-Historie (Web-App und Desktop-App)
+# Jeder Scrape wird als Momentaufnahme (Route, Datum, Abrufzeit, Flüge) in einer lokalen
+# SQLite-Datenbank abgelegt - nur anhängen, nie überschreiben. Damit können identische Suchen
+# auch nach einem Neustart aus frischen Daten beantwortet und Preisverläufe ohne neuen Scrape
+# angezeigt werden.
+# Zusätzlich wird für jede Preisalarm-Prüfung ein Punkt (Route, Zeit, günstigster Preis) in einer
+# eigenen Zeitreihe abgelegt, die für Diagramme auf wenige Punkte verdichtet ausgeliefert wird.
+import os
+import json
+import math
+import time
+import sqlite3
+import threading
+import dataclasses
+
+from fast_flights import Flight, Result
+
+from flight_results import parse_prices
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    date TEXT NOT NULL,
+    trip TEXT NOT NULL,
+    seat TEXT NOT NULL,
+    passengers TEXT NOT NULL,
+    legs TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    current_price TEXT,
+    min_price REAL,
+    flight_count INTEGER NOT NULL,
+    flights TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_route ON snapshots (origin, destination, date, fetched_at);
+CREATE TABLE IF NOT EXISTS price_points (
+    origin TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    date TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_price_points_route ON price_points (origin, destination, date, checked_at);
+"""
+
+# Benannte Auflösungen für Preisverläufe (Sekunden pro Bucket, 0 = alle Rohpunkte)
+RESOLUTIONS = {'raw': 0, 'hour': 3600, '6h': 6 * 3600, 'day': 86400, 'week': 7 * 86400}
+MAX_SERIES_POINTS = 200  # Ziel-Anzahl Buckets, wenn keine Auflösung angegeben ist
+
+
+class FlightHistory:
+    """Append-only Speicher für Suchergebnisse, indiziert nach Route und Datum"""
+
+    def __init__(self, path, retention_days=180):
+        self.path = path
+        self.retention_days = retention_days
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.writes = 0
+
+    def _connection(self):
+        """Öffnet die Datenbank beim ersten Zugriff (Aufrufer hält self._lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            if self.retention_days:
+                cutoff = time.time() - self.retention_days * 86400
+                conn.execute('DELETE FROM snapshots WHERE fetched_at < ?', (cutoff,))
+                conn.execute('DELETE FROM price_points WHERE checked_at < ?', (cutoff,))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _split_key(key):
+        """Suchschlüssel aus make_search_key -> Spaltenwerte (Route/Datum vom ersten Abschnitt)"""
+        trip, seat, _, pax, legs = key
+        date, origin, destination, _ = legs[0]
+        return {
+            'origin': origin,
+            'destination': destination,
+            'date': date,
+            'trip': trip,
+            'seat': seat,
+            'passengers': json.dumps(list(pax)),
+            'legs': json.dumps([list(leg) for leg in legs]),
+        }
+
+    def record(self, key, result, fetched_at=None):
+        """Legt eine Momentaufnahme für einen Suchschlüssel ab"""
+        if not (result and result.flights):
+            return
+        columns = self._split_key(key)
+        flights = [dataclasses.asdict(flight) for flight in result.flights]
+        prices = [p for p in parse_prices(f['price'] for f in flights) if p]
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT INTO snapshots (origin, destination, date, trip, seat, passengers, legs, fetched_at, '
+                'current_price, min_price, flight_count, flights) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (columns['origin'], columns['destination'], columns['date'], columns['trip'], columns['seat'],
+                 columns['passengers'], columns['legs'], fetched_at or time.time(), result.current_price,
+                 min(prices) if prices else None, len(flights), json.dumps(flights))
+            )
+            conn.commit()
+            self.writes += 1
+
+    def latest(self, key, max_age):
+        """Jüngstes Ergebnis für den Suchschlüssel, wenn es höchstens `max_age` Sekunden alt ist"""
+        columns = self._split_key(key)
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT current_price, flights FROM snapshots '
+                'WHERE origin = ? AND destination = ? AND date = ? AND fetched_at >= ? '
+                'AND trip = ? AND seat = ? AND passengers = ? AND legs = ? '
+                'ORDER BY fetched_at DESC LIMIT 1',
+                (columns['origin'], columns['destination'], columns['date'], time.time() - max_age,
+                 columns['trip'], columns['seat'], columns['passengers'], columns['legs'])
+            ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            result = Result(current_price=row[0], flights=[Flight(**f) for f in json.loads(row[1])])
+        except (TypeError, ValueError) as e:
+            # Ältere/inkompatible Datensätze ignorieren, dann wird neu gesucht
+            print(f"⚠️ Historie-Eintrag nicht lesbar: {e}")
+            return None
+        self.hits += 1
+        return result
+
+    def price_trend(self, origin, destination, date, passengers=(1, 0, 0, 0), since=None, limit=500):
+        """Günstigster Preis je Abruf für eine Route/Datum, älteste zuerst"""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT fetched_at, min_price, current_price, flight_count FROM snapshots '
+                'WHERE origin = ? AND destination = ? AND date = ? AND fetched_at >= ? '
+                "AND trip = 'one-way' AND passengers = ? "
+                'ORDER BY fetched_at DESC LIMIT ?',
+                (origin.upper(), destination.upper(), date, since or 0, json.dumps(list(passengers)), limit)
+            ).fetchall()
+        return [
+            {'fetchedAt': fetched_at, 'minPrice': min_price, 'currentPrice': current_price, 'flights': count}
+            for fetched_at, min_price, current_price, count in reversed(rows)
+        ]
+
+    def record_price(self, origin, destination, date, price, checked_at=None):
+        """Hängt einen Punkt an die Preis-Zeitreihe einer Route an (z.B. nach jeder Alarm-Prüfung)"""
+        if price is None:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.execute('INSERT INTO price_points (origin, destination, date, checked_at, price) VALUES (?, ?, ?, ?, ?)',
+                         (origin.upper(), destination.upper(), date, checked_at or time.time(), float(price)))
+            conn.commit()
+
+    def price_series(self, origin, destination, date, since=None, resolution=None):
+        """
+        Preis-Zeitreihe einer Route, verdichtet auf Buckets mit min/max/letztem Preis.
+        `resolution`: Sekunden pro Bucket oder Name aus RESOLUTIONS; ohne Angabe wird so gewählt,
+        dass etwa MAX_SERIES_POINTS Buckets entstehen.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT checked_at, price FROM price_points '
+                'WHERE origin = ? AND destination = ? AND date = ? AND checked_at >= ? ORDER BY checked_at',
+                (origin.upper(), destination.upper(), date, since or 0)
+            ).fetchall()
+
+        bucket_seconds = parse_resolution(resolution)
+        if bucket_seconds is None and rows:
+            span = rows[-1][0] - rows[0][0]
+            bucket_seconds = max(60, int(math.ceil(span / MAX_SERIES_POINTS)))
+        return {'resolution': bucket_seconds or 0, 'rawPoints': len(rows), 'points': downsample(rows, bucket_seconds)}
+
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            snapshots = conn.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+            price_points = conn.execute('SELECT COUNT(*) FROM price_points').fetchone()[0]
+        return {'snapshots': snapshots, 'pricePoints': price_points, 'hits': self.hits, 'writes': self.writes}
+
+
+def parse_resolution(resolution):
+    """'day' / '3600' / 3600 -> Sekunden pro Bucket, None = automatisch"""
+    if resolution in (None, '', 'auto'):
+        return None
+    if resolution in RESOLUTIONS:
+        return RESOLUTIONS[resolution]
+    seconds = int(resolution)
+    if seconds < 0:
+        raise ValueError('Auflösung muss positiv sein')
+    return seconds
+
+
+def downsample(rows, bucket_seconds):
+    """
+    Verdichtet zeitlich sortierte (zeitpunkt, preis)-Paare auf Buckets fester Länge.
+    Pro Bucket: Startzeit, günstigster, teuerster und zuletzt gesehener Preis.
+    So bleiben Ausreißer nach unten/oben im Diagramm sichtbar, auch bei Monaten stündlicher Punkte.
+    """
+    if not bucket_seconds:
+        return [{'t': t, 'min': p, 'max': p, 'last': p, 'count': 1} for t, p in rows]
+
+    points = []
+    current = None
+    for t, price in rows:
+        bucket = int(t // bucket_seconds) * bucket_seconds
+        if current is None or current['t'] != bucket:
+            current = {'t': bucket, 'min': price, 'max': price, 'last': price, 'count': 0}
+            points.append(current)
+        current['min'] = min(current['min'], price)
+        current['max'] = max(current['max'], price)
+        current['last'] = price
+        current['count'] += 1
+    return points
+
+
+# Gemeinsame Instanz für Web-App und Desktop-App (TRAVELFOLIO_HISTORY_DB='' deaktiviert die Historie)
+_default_db = os.path.join(os.path.expanduser("~"), ".travelfolio", "flight_history.sqlite3")
+_history_path = os.environ.get('TRAVELFOLIO_HISTORY_DB', _default_db)
+flight_history = FlightHistory(
+    _history_path,
+    retention_days=int(os.environ.get('TRAVELFOLIO_HISTORY_RETENTION_DAYS', 180)),
+) if _history_path else None
@@ -0,0 +1,236 @@
+# Nachbearbeitung von Suchergebnissen (Web-App und Desktop-App)
+# Preise, Dauer, Stopps und Abflugzeiten werden einmal pro Ergebnisliste spaltenweise geparst,
+# statt bei jedem min()/sort() erneut pro Flug. Darauf bauen serverseitige Filter
+# (max. Stopps, Abflugzeit-Fenster, max. Preis) und Sortierung (Preis, Dauer, Abflug) auf.
+import re
+
+_PRICE_STRIP_RE = re.compile(r'[€$£¥\s,]')
+_DURATION_RE = re.compile(r'(?:(\d+)\s*hr?s?)?\s*(?:(\d+)\s*min)?')
+_TIME_RE = re.compile(r'(\d{1,2}):(\d{2})\s*([AaPp][Mm])?')
+
+SORT_KEYS = ('price', 'duration', 'departure')
+
+
+def parse_prices(values):
+    """['€1,024', '$99', 87] -> [1024.0, 99.0, 87.0], unlesbare Werte -> None"""
+    parsed = []
+    for value in values:
+        if isinstance(value, (int, float)):
+            parsed.append(float(value))
+            continue
+        try:
+            parsed.append(float(_PRICE_STRIP_RE.sub('', value)))
+        except (TypeError, ValueError):
+            parsed.append(None)
+    return parsed
+
+
+def parse_durations(values):
+    """['2 hr 35 min', '45 min'] -> [155, 45], unbekannt -> None"""
+    parsed = []
+    for value in values:
+        match = _DURATION_RE.search(str(value or ''))
+        if not match or not any(match.groups()):
+            parsed.append(None)
+            continue
+        hours, minutes = match.groups()
+        parsed.append(int(hours or 0) * 60 + int(minutes or 0))
+    return parsed
+
+
+def parse_clock_minutes(values):
+    """['10:35 AM on Mon, Jun 2', '18:05'] -> [635, 1085] (Minuten seit Mitternacht), unbekannt -> None"""
+    parsed = []
+    for value in values:
+        match = _TIME_RE.search(str(value or ''))
+        if not match:
+            parsed.append(None)
+            continue
+        hours, minutes, meridiem = int(match.group(1)), int(match.group(2)), (match.group(3) or '').upper()
+        if meridiem == 'PM' and hours != 12:
+            hours += 12
+        elif meridiem == 'AM' and hours == 12:
+            hours = 0
+        parsed.append(hours * 60 + minutes)
+    return parsed
+
+
+def _parse_stops(values):
+    """Stopps als int, 'Unknown' (nicht lesbar) -> None"""
+    return [value if isinstance(value, int) else None for value in values]
+
+
+class FlightTable:
+    """
+    Spaltenbasierte Sicht auf eine Ergebnisliste.
+    Filter und Sortierung arbeiten nur auf einer Liste von Zeilennummern; die Dicts für
+    das Frontend werden erst ganz am Ende für die verbliebenen Zeilen gebaut.
+    """
+
+    def __init__(self, flights, extra=None):
+        self.airlines = [f.name for f in flights]
+        self.prices = [f.price for f in flights]
+        self.departures = [f.departure for f in flights]
+        self.arrivals = [f.arrival for f in flights]
+        self.durations = [f.duration for f in flights]
+        self.stops = [f.stops for f in flights]
+
+        self.price_values = parse_prices(self.prices)
+        self.duration_minutes = parse_durations(self.durations)
+        self.departure_minutes = parse_clock_minutes(self.departures)
+        self.stop_counts = _parse_stops(self.stops)
+
+        self.extra = extra  # Optional: zusätzliche Felder pro Zeile (z.B. verwendeter Flughafen)
+        self.rows = list(range(len(flights)))
+
+    _COLUMNS = ('airlines', 'prices', 'departures', 'arrivals', 'durations', 'stops',
+                'price_values', 'duration_minutes', 'departure_minutes', 'stop_counts')
+
+    @classmethod
+    def from_result(cls, result):
+        return cls(result.flights if result and result.flights else [])
+
+    @classmethod
+    def concat(cls, tables, extras=None):
+        """
+        Fügt mehrere Tabellen (nur deren aktuelle Zeilen) zu einer zusammen, ohne neu zu parsen.
+        `extras`: pro Tabelle ein Dict mit zusätzlichen Feldern für alle ihre Zeilen.
+        """
+        table = object.__new__(cls)
+        for name in cls._COLUMNS:
+            setattr(table, name, [getattr(t, name)[i] for t in tables for i in t.rows])
+        if extras or any(t.extra for t in tables):
+            table.extra = [
+                {**(t.extra[i] if t.extra else {}), **(extras[n] if extras else {})}
+                for n, t in enumerate(tables) for i in t.rows
+            ]
+        else:
+            table.extra = None
+        table.rows = list(range(len(table.airlines)))
+        return table
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _select(self, rows):
+        table = object.__new__(FlightTable)
+        table.__dict__.update(self.__dict__)
+        table.rows = rows
+        return table
+
+    def filter(self, max_stops=None, max_price=None, depart_after=None, depart_before=None, max_duration=None):
+        """
+        Neue Tabelle mit den Zeilen, die alle gesetzten Bedingungen erfüllen.
+        Abflugzeiten in Minuten seit Mitternacht; ist depart_after > depart_before,
+        gilt das Fenster über Mitternacht (z.B. 22:00-06:00).
+        Flüge mit unbekanntem Wert fallen bei einem gesetzten Filter auf diesen Wert heraus.
+        """
+        rows = self.rows
+        if max_stops is not None:
+            stops = self.stop_counts
+            rows = [i for i in rows if stops[i] is not None and stops[i] <= max_stops]
+        if max_price is not None:
+            prices = self.price_values
+            rows = [i for i in rows if prices[i] is not None and prices[i] <= max_price]
+        if max_duration is not None:
+            durations = self.duration_minutes
+            rows = [i for i in rows if durations[i] is not None and durations[i] <= max_duration]
+        if depart_after is not None or depart_before is not None:
+            start = depart_after if depart_after is not None else 0
+            end = depart_before if depart_before is not None else 24 * 60
+            departures = self.departure_minutes
+            if start <= end:
+                rows = [i for i in rows if departures[i] is not None and start <= departures[i] <= end]
+            else:
+                rows = [i for i in rows if departures[i] is not None and (departures[i] >= start or departures[i] <= end)]
+        return self._select(rows)
+
+    def sort(self, by='price', descending=False):
+        """Neue Tabelle sortiert nach 'price', 'duration' oder 'departure' (unbekannte Werte immer ans Ende)"""
+        if by not in SORT_KEYS:
+            raise ValueError(f"Unbekannte Sortierung: {by}")
+        column = {'price': self.price_values, 'duration': self.duration_minutes,
+                  'departure': self.departure_minutes}[by]
+        known = [i for i in self.rows if column[i] is not None]
+        unknown = [i for i in self.rows if column[i] is None]
+        known.sort(key=column.__getitem__, reverse=descending)
+        return self._select(known + unknown)
+
+    def cheapest(self):
+        """Zeile mit dem günstigsten lesbaren Preis als Dict oder None"""
+        prices = self.price_values
+        known = [i for i in self.rows if prices[i] is not None]
+        if not known:
+            return None
+        return self._select([min(known, key=prices.__getitem__)]).to_dicts()[0]
+
+    def cheapest_price(self):
+        """Günstigster lesbarer Preis der (gefilterten) Tabelle oder None"""
+        values = [self.price_values[i] for i in self.rows if self.price_values[i] is not None]
+        return min(values) if values else None
+
+    def to_dicts(self):
+        """Zeilen als Dicts für das Frontend (gleiche Felder wie bisher plus geparste Werte)"""
+        return [
+            {
+                'airline': self.airlines[i],
+                'price': self.prices[i],
+                'departure': self.departures[i],
+                'arrival': self.arrivals[i],
+                'duration': self.durations[i],
+                'stops': self.stops[i],
+                'priceValue': self.price_values[i],
+                'durationMinutes': self.duration_minutes[i],
+                **(self.extra[i] if self.extra else {}),
+            }
+            for i in self.rows
+        ]
+
+
+def _parse_clock(value, name):
+    """'06:30' -> 390 für die Filter-Optionen"""
+    minutes = parse_clock_minutes([value])[0]
+    if minutes is None or minutes >= 24 * 60:
+        raise ValueError(f"{name} muss eine Uhrzeit (HH:MM) sein")
+    return minutes
+
+
+def result_options(data):
+    """
+    Filter und Sortierung aus dem Request, z.B.
+    {"filters": {"maxStops": 1, "maxPrice": 400, "departAfter": "06:00", "departBefore": "12:00"},
+     "sort": "duration", "order": "desc"}
+    Gibt None zurück, wenn nichts gesetzt ist (dann bleibt die Reihenfolge von Google Flights).
+    """
+    data = data if isinstance(data, dict) else {}
+    filters = data.get('filters') or {}
+    if not isinstance(filters, dict):
+        raise ValueError('filters muss ein Objekt sein')
+
+    options = {'filters': {}, 'sort': data.get('sort'), 'descending': data.get('order') == 'desc'}
+    if filters.get('maxStops') is not None:
+        options['filters']['max_stops'] = int(filters['maxStops'])
+    if filters.get('maxPrice') is not None:
+        options['filters']['max_price'] = float(filters['maxPrice'])
+    if filters.get('maxDuration') is not None:
+        options['filters']['max_duration'] = int(filters['maxDuration'])
+    if filters.get('departAfter'):
+        options['filters']['depart_after'] = _parse_clock(filters['departAfter'], 'departAfter')
+    if filters.get('departBefore'):
+        options['filters']['depart_before'] = _parse_clock(filters['departBefore'], 'departBefore')
+    if options['sort'] is not None and options['sort'] not in SORT_KEYS:
+        raise ValueError(f"sort muss einer von {', '.join(SORT_KEYS)} sein")
+
+    if not options['filters'] and not options['sort']:
+        return None
+    return options
+
+
+def apply_options(table, options):
+    """Wendet result_options() auf eine FlightTable an"""
+    if not options:
+        return table
+    table = table.filter(**options['filters'])
+    if options['sort']:
+        table = table.sort(options['sort'], options['descending'])
+    return table
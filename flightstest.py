@@ -1,4 +1,5 @@
-from fast_flights import FlightData, Passengers, Result, get_flights
+from fast_flights import FlightData, Passengers, Result
+from browser_pool import pooled_get_flights
 import random
 from datetime import datetime, timedelta
 
@@ -49,7 +50,7 @@ def search_random_flight():
 
         # Suche ausführen
         # mode="flight" wird oft als Standard angenommen, trip="one-way"
-        result: Result = get_flights(
+        result: Result = pooled_get_flights(
             flight_data=flight_data_list,
             trip="one-way",
             seat="economy",
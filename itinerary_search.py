@@ -0,0 +1,104 @@
+# Hin- und Rückflug sowie Gabelflüge (Multi-City) für Web-App und Desktop-App
+# Jede Teilstrecke wird als eigene One-Way-Suche parallel abgefragt (und landet im Cache),
+# danach werden die günstigsten Flüge pro Strecke zu Reiseverläufen kombiniert
+# und nach Gesamtpreis und Gesamtdauer sortiert.
+import os
+import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from search_engine import find_flights
+
+MAX_LEGS = 6
+FLIGHTS_PER_LEG = 5  # Nur die günstigsten Flüge pro Strecke werden kombiniert
+MAX_ITINERARIES = 20
+LEG_WORKERS = int(os.environ.get('TRAVELFOLIO_LEG_WORKERS', 3))
+
+
+def _parse_date(value, name):
+    """Prüft ein Datum im Format YYYY-MM-DD und gibt es unverändert zurück"""
+    if not isinstance(value, str):
+        raise ValueError(f'{name} muss ein Datum (YYYY-MM-DD) sein')
+    try:
+        datetime.datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{name} muss ein Datum (YYYY-MM-DD) sein')
+    return value
+
+
+def trip_legs(trip, data):
+    """
+    Teilstrecken (origin, destination, date) aus dem Request:
+      round-trip: origin, destination, date, returnDate
+      multi-city: legs = [{origin, destination, date}, ...]
+    """
+    if trip == 'round-trip':
+        origin = str(data.get('origin', '')).upper()
+        destination = str(data.get('destination', '')).upper()
+        date = data.get('date')
+        return_date = data.get('returnDate')
+        if not all([origin, destination, date, return_date]):
+            raise ValueError('Hin- und Rückflug benötigt origin, destination, date und returnDate')
+        date = _parse_date(date, 'date')
+        return_date = _parse_date(return_date, 'returnDate')
+        if return_date < date:
+            raise ValueError('Rückflug liegt vor dem Hinflug')
+        return [(origin, destination, date), (destination, origin, return_date)]
+
+    if trip == 'multi-city':
+        legs = data.get('legs') or []
+        if not isinstance(legs, list) or not 2 <= len(legs) <= MAX_LEGS:
+            raise ValueError(f'Gabelflug benötigt 2 bis {MAX_LEGS} Teilstrecken')
+        parsed = []
+        for leg in legs:
+            if not isinstance(leg, dict):
+                raise ValueError('Jede Teilstrecke muss ein Objekt sein')
+            origin = str(leg.get('origin', '')).upper()
+            destination = str(leg.get('destination', '')).upper()
+            if not all([origin, destination, leg.get('date')]):
+                raise ValueError('Jede Teilstrecke benötigt origin, destination und date')
+            parsed.append((origin, destination, _parse_date(leg['date'], 'date')))
+        return parsed
+
+    raise ValueError(f'Unbekannter Reisetyp: {trip}')
+
+
+def search_itinerary(trip, legs, passengers, filters=None, max_workers=None):
+    """
+    Sucht alle Teilstrecken parallel und kombiniert sie zu Reiseverläufen.
+    `filters` (siehe FlightTable.filter, z.B. max_stops) gelten für jede Teilstrecke einzeln.
+    """
+    def search_leg(leg):
+        origin, destination, date = leg
+        table = find_flights(origin, destination, date, passengers, purpose='itinerary')
+        return table.filter(**(filters or {})).sort('price').to_dicts()
+
+    with ThreadPoolExecutor(max_workers=max_workers or LEG_WORKERS, thread_name_prefix='leg-search') as executor:
+        leg_flights = list(executor.map(search_leg, legs))
+
+    # Nur Flüge mit gültigem Preis kombinieren, pro Strecke die günstigsten
+    candidates = [[f for f in flights if f['priceValue'] is not None][:FLIGHTS_PER_LEG] for flights in leg_flights]
+
+    itineraries = []
+    if all(candidates):
+        for combination in itertools.product(*candidates):
+            durations = [f['durationMinutes'] for f in combination]
+            itineraries.append({
+                'totalPrice': round(sum(f['priceValue'] for f in combination), 2),
+                'totalDurationMinutes': sum(durations) if None not in durations else None,
+                'flights': list(combination),
+            })
+        itineraries.sort(key=lambda i: (
+            i['totalPrice'],
+            i['totalDurationMinutes'] if i['totalDurationMinutes'] is not None else float('inf'),
+        ))
+
+    return {
+        'success': True,
+        'trip': trip,
+        'legs': [
+            {'origin': origin, 'destination': destination, 'date': date, 'flights': flights}
+            for (origin, destination, date), flights in zip(legs, leg_flights)
+        ],
+        'itineraries': itineraries[:MAX_ITINERARIES],
+    }
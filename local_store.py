@@ -0,0 +1,159 @@
+# Lokaler Offline-Speicher der Desktop-App (Trips und Preisalarme ohne Login)
+# Früher wurde bei jeder Änderung die komplette trips.json/alerts.json gelesen und neu geschrieben.
+# Jetzt liegt jeder Trip/Alert als eigene Zeile in einer SQLite-Datenbank (WAL-Modus):
+# Speichern und Löschen sind Zugriffe über den Primärschlüssel, jede Änderung ist atomar.
+# Außerdem liegen hier die noch nicht nach Firestore geschriebenen Änderungen (siehe write_queue.py).
+import os
+import json
+import sqlite3
+import threading
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trips (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pending_writes (
+    path TEXT PRIMARY KEY,
+    op TEXT NOT NULL,
+    data TEXT,
+    seq INTEGER NOT NULL
+);
+"""
+
+KINDS = ('trips', 'alerts')
+
+
+class LocalStore:
+    """Schlüssel-Wert-Speicher für Trips und Alerts (eine Zeile pro Dokument)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """Öffnet die Datenbank beim ersten Zugriff (Aufrufer hält self._lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._import_json_files(conn)
+            self._conn = conn
+        return self._conn
+
+    def _import_json_files(self, conn):
+        """Übernimmt einmalig die alten trips.json/alerts.json aus dem gleichen Ordner"""
+        data_dir = os.path.dirname(os.path.abspath(self.path))
+        for kind in KINDS:
+            json_path = os.path.join(data_dir, f"{kind}.json")
+            if not os.path.exists(json_path):
+                continue
+            try:
+                with open(json_path, 'r') as f:
+                    data = json.load(f)
+                # trips.json ist ein Dict (id -> Trip), alerts.json eine Liste von Alerts mit 'id'
+                items = data.items() if isinstance(data, dict) else ((item.get('id'), item) for item in data)
+                with conn:
+                    conn.executemany(
+                        f'INSERT OR IGNORE INTO {kind} (id, data) VALUES (?, ?)',
+                        [(str(doc_id), json.dumps(doc)) for doc_id, doc in items if doc_id is not None]
+                    )
+                os.replace(json_path, json_path + '.migrated')
+                print(f"📦 {kind}.json in die lokale Datenbank übernommen")
+            except Exception as e:
+                print(f"⚠️ {kind}.json konnte nicht übernommen werden: {e}")
+
+    def put(self, kind, doc_id, data):
+        """Legt ein Dokument an oder ersetzt es"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                # ON CONFLICT statt REPLACE: die rowid (und damit die Reihenfolge) bleibt erhalten
+                conn.execute(f'INSERT INTO {_table(kind)} (id, data) VALUES (?, ?) '
+                             'ON CONFLICT(id) DO UPDATE SET data = excluded.data',
+                             (str(doc_id), json.dumps(data)))
+        return True
+
+    def delete(self, kind, doc_id):
+        """Löscht ein Dokument, gibt False zurück, wenn es nicht existierte"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(f'DELETE FROM {_table(kind)} WHERE id = ?', (str(doc_id),))
+        return cursor.rowcount > 0
+
+    def get(self, kind, doc_id):
+        with self._lock:
+            row = self._connection().execute(f'SELECT data FROM {_table(kind)} WHERE id = ?',
+                                             (str(doc_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self, kind):
+        """Alle Dokumente als [(id, data)] in Einfüge-Reihenfolge"""
+        with self._lock:
+            rows = self._connection().execute(f'SELECT id, data FROM {_table(kind)} ORDER BY rowid').fetchall()
+        return [(doc_id, json.loads(data)) for doc_id, data in rows]
+
+    def load(self):
+        """Alle Daten im Format von dataLoaded: {'trips': {id: trip}, 'alerts': [alert, ...]}"""
+        return {
+            'trips': dict(self.all('trips')),
+            'alerts': [data for _, data in self.all('alerts')],
+        }
+
+    # --- Ausstehende Firestore-Schreibvorgänge ---
+
+    def queue_write(self, path, op, data=None):
+        """
+        Merkt einen Schreibvorgang ('set' oder 'delete') für ein Firestore-Dokument vor.
+        Pro Dokument bleibt nur der letzte Vorgang stehen (mehrfaches Speichern wird zusammengefasst).
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM pending_writes').fetchone()[0]
+                conn.execute('INSERT INTO pending_writes (path, op, data, seq) VALUES (?, ?, ?, ?) '
+                             'ON CONFLICT(path) DO UPDATE SET op = excluded.op, data = excluded.data, seq = excluded.seq',
+                             (path, op, json.dumps(data) if data is not None else None, seq))
+
+    def pending_writes(self, limit=None, prefix=None):
+        """Ausstehende Vorgänge als [(path, op, data, seq)], älteste zuerst"""
+        query = 'SELECT path, op, data, seq FROM pending_writes'
+        params = []
+        if prefix:
+            query += ' WHERE substr(path, 1, ?) = ?'
+            params += [len(prefix), prefix]
+        query += ' ORDER BY seq'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._connection().execute(query, params).fetchall()
+        return [(path, op, json.loads(data) if data is not None else None, seq) for path, op, data, seq in rows]
+
+    def ack_writes(self, written):
+        """
+        Entfernt geschriebene Vorgänge [(path, seq)].
+        Wurde ein Dokument während des Schreibens erneut geändert (neue seq), bleibt der neue Vorgang stehen.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany('DELETE FROM pending_writes WHERE path = ? AND seq = ?', written)
+
+    def pending_count(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM pending_writes').fetchone()[0]
+
+
+def _table(kind):
+    if kind not in KINDS:
+        raise ValueError(f"Unbekannte Collection: {kind}")
+    return kind
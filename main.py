@@ -3,58 +3,48 @@
 import time
 import os
 import uuid
+import json
 import threading
-from flask import Flask, request, render_template, jsonify, make_response, session
-from fast_flights import FlightData, Passengers, get_flights, search_airport
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, Response, request, render_template, jsonify, make_response, session, stream_with_context
 
-import firebase_admin
-from firebase_admin import auth, credentials, firestore
+from firebase_admin import auth
 
 import datetime
 
-import airportsdata
-import re
+from flight_cache import flight_cache, passenger_key, search_flight
+from alert_scheduler import AlertScheduler
+from search_jobs import search_jobs
+from browser_pool import browser_pool
+from price_calendar import build_price_calendar, date_window
+from anywhere_search import iter_cheapest_fares, select_destinations
+from itinerary_search import search_itinerary, trip_legs
+from airport_index import get_airport_index
+from airport_store import airport_store
+from airport_geo import nearby_airports
+from nearby_search import nearby_options, search_nearby
+from flight_results import result_options
+from flight_history import flight_history
+from session_cache import SessionCache
+from storage import DOCUMENT_ID, NOT_FOUND_ERRORS, open_storage
+from data_sync import delete_doc, load_user_data, now_ms, save_doc, user_key
+from search_engine import (airport_coords, alert_route_key, apply_alert_price, build_passengers, check_alert_route,
+                           clean_price, resolve_iata, search_flights, search_stats)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')  # Für Session-Management
 
-# Hilfsfunktion zum Bereinigen von Preisen
-def clean_price(price_value):
-    """
-    Konvertiert Preiswerte zu float, entfernt €-Zeichen, Kommas, etc.
-    Beispiele: '€1024' -> 1024.0, '1,234.56' -> 1234.56, '1024' -> 1024.0
-    """
-    if price_value is None:
-        return None
-
-    # Falls bereits eine Zahl, direkt zurückgeben
-    if isinstance(price_value, (int, float)):
-        return float(price_value)
-
-    # String-Verarbeitung
-    if isinstance(price_value, str):
-        # Entferne Währungssymbole und Leerzeichen
-        cleaned = re.sub(r'[€$£¥\s]', '', price_value)
-        # Entferne Tausendertrennzeichen (Komma)
-        cleaned = cleaned.replace(',', '')
-        try:
-            return float(cleaned)
-        except (ValueError, TypeError):
-            return None
-
-    return None
+# Flughafendatenbank (gemeinsam mit der Desktop-App, wird erst beim ersten Zugriff geladen)
+airports_db = airport_store
 
-print("Lade Flughafendatenbank für Web-API...")
-airports_db = airportsdata.load('IATA')
-print(f" Datenbank geladen ({len(airports_db)} Einträge)")
+# Speicher für Trips/Alerts: Firestore, wenn der Firebase-Schlüssel vorhanden ist, sonst lokal in SQLite
+# (TRAVELFOLIO_STORAGE=firestore|memory|sqlite erzwingt ein Backend, siehe storage.py)
+db = open_storage(fallback='sqlite')
 
-# Firebase Admin SDK Initialisierung
-db = None
-if(os.path.exists("./firebase-key/travel-e75e6-firebase-adminsdk-fbsvc-7ba67c5552.json")):
-    print("Firebase-Schlüssel gefunden und wird geladen.")
-    cred = credentials.Certificate("./firebase-key/travel-e75e6-firebase-adminsdk-fbsvc-7ba67c5552.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
+# Geprüfte Session-Cookies werden kurz zwischengespeichert (siehe session_cache.py),
+# damit nicht jede Anfrage einen Netzwerk-Aufruf für die Widerrufsprüfung kostet
+session_cache = SessionCache(auth.verify_session_cookie)
 
 # Falls ein Cookie schon gespeichert ist, soll dieser geladen werden, um den Nutzer angemeldet zu halten
 def get_authenticated_user():
@@ -62,11 +52,8 @@ def get_authenticated_user():
     session_cookie = request.cookies.get('session')
     if not session_cookie:
         return None
-    try:
-        decoded_claims = auth.verify_session_cookie(session_cookie, check_revoked=True)
-        return decoded_claims['uid']
-    except Exception:
-        return None
+    decoded_claims = session_cache.claims(session_cookie)
+    return decoded_claims['uid'] if decoded_claims else None
 
 def get_user_id():
     """
@@ -86,111 +73,191 @@ def get_user_id():
     return session['anonymous_id'], False  # (anonymous_id, is_authenticated)
 
 # Preischecker für Preisalarme
+ALERT_CHECK_INTERVAL = int(os.environ.get('TRAVELFOLIO_ALERT_INTERVAL', 3600))  # Max. Sekunden zwischen zwei Durchläufen
+ALERT_MIN_SLEEP = int(os.environ.get('TRAVELFOLIO_ALERT_MIN_SLEEP', 300))  # Min. Sekunden zwischen zwei Durchläufen
+ALERT_SCHEDULE_FILE = os.environ.get('TRAVELFOLIO_ALERT_SCHEDULE', './alert_schedule.json')  # Persistenter Zeitplan
+ALERT_CHECK_WORKERS = int(os.environ.get('TRAVELFOLIO_ALERT_WORKERS', 4))  # Max. gleichzeitige Flugsuchen
+ALERT_PAGE_SIZE = int(os.environ.get('TRAVELFOLIO_ALERT_PAGE_SIZE', 500))  # Alerts pro Seite beim Lesen
+FIRESTORE_BATCH_LIMIT = 500  # Max. Schreibvorgänge pro Firestore-Batch
+MANUAL_ALERT_WORKERS = int(os.environ.get('TRAVELFOLIO_MANUAL_ALERT_WORKERS', 4))  # Gleichzeitige Suchen pro Anfrage
+MANUAL_ALERT_LIMIT = int(os.environ.get('TRAVELFOLIO_MANUAL_ALERT_LIMIT', 50))  # Max. Alerts pro Anfrage
+
+def check_route_alerts(route_key, route_alerts):
+    """
+    Eine Flugsuche für eine Route, danach werden alle Alerts dieser Route ausgewertet.
+    Gibt (Counter mit den Status-Werten, Liste der Updates (reference, update_data), Preis) zurück.
+    """
+    origin, dest, search_date = route_key
+    stats = Counter()
+    updates = []
+
+    try:
+        current_price = check_alert_route(origin, dest, search_date)
+    except Exception as e:
+        print(f"   ⚠️ Fehler bei Preischeck für {origin} → {dest} am {search_date}: {e}")
+        stats['error'] += len(route_alerts)
+        return stats, updates, None
+
+    if current_price is None:
+        print(f"   ⚠️ Kein gültiger Preis für {origin} → {dest} am {search_date}")
+        stats['skipped'] += len(route_alerts)
+        return stats, updates, None
+
+    for user_id, alert_doc, alert_data in route_alerts:
+        try:
+            status, update_data = apply_alert_price(user_id, alert_data, current_price)
+            stats[status] += 1
+            updates.append((alert_doc.reference, update_data))
+        except Exception as e:
+            print(f"   ⚠️ Fehler beim Auswerten des Alerts {alert_doc.id} für {user_id}: {e}")
+            stats['error'] += 1
+
+    return stats, updates, current_price
+
+def iter_all_alerts(client, page_size=None):
+    """
+    Liest alle Alerts aller User mit einer einzigen Collection-Group-Query.
+    Die Abfrage wird seitenweise (Cursor über die Dokument-ID) abgearbeitet.
+    Liefert Tupel (user_id, alert_doc).
+    """
+    page_size = page_size or ALERT_PAGE_SIZE
+    users_prefix = 'artifacts/travelfolio-3d-001/users/'
+    query = client.collection_group('alerts').order_by(DOCUMENT_ID).limit(page_size)
+
+    last_doc = None
+    while True:
+        page = query.start_after(last_doc) if last_doc is not None else query
+        docs = list(page.stream())
+
+        for alert_doc in docs:
+            # Collection-Group erfasst alle 'alerts'-Collections, nur die der User dieser App verwenden
+            if alert_doc.reference.path.startswith(users_prefix):
+                yield alert_doc.reference.parent.parent.id, alert_doc
+
+        if len(docs) < page_size:
+            break
+        last_doc = docs[-1]
+
+def commit_alert_updates(client, updates):
+    """
+    Schreibt Alert-Änderungen gebündelt nach Firestore (max. FIRESTORE_BATCH_LIMIT pro Batch).
+    Gibt die Anzahl der erfolgreich geschriebenen Updates zurück.
+    """
+    written = 0
+    for i in range(0, len(updates), FIRESTORE_BATCH_LIMIT):
+        chunk = updates[i:i + FIRESTORE_BATCH_LIMIT]
+        # updatedAt erst beim Schreiben setzen: ein Durchlauf kann Minuten dauern, und ein Client,
+        # der zwischendurch Änderungen abruft, würde früher gestempelte Updates sonst nie sehen
+        written_at = now_ms()
+        batch = client.batch()
+        for reference, update_data in chunk:
+            batch.update(reference, {**update_data, 'updatedAt': written_at})
+        try:
+            batch.commit()
+            written += len(chunk)
+        except Exception as e:
+            # Ein Batch ist atomar: ein zwischenzeitlich gelöschter Alert lässt alle Updates scheitern.
+            # Dann einzeln schreiben, damit lastSeenPrice/notifiedAt der übrigen Alerts nicht verloren gehen
+            print(f"   ⚠️ Fehler beim Schreiben eines Alert-Batches ({len(chunk)} Updates), schreibe einzeln: {e}")
+            written += commit_alert_updates_singly(chunk, written_at)
+    return written
+
+def commit_alert_updates_singly(chunk, written_at):
+    """Fallback für commit_alert_updates: jedes Update einzeln, gelöschte Alerts werden übersprungen"""
+    written = 0
+    for reference, update_data in chunk:
+        try:
+            reference.update({**update_data, 'updatedAt': written_at})
+            written += 1
+        except NOT_FOUND_ERRORS:
+            print(f"   ℹ️ Alert {reference.id} wurde während der Prüfung gelöscht, übersprungen")
+        except Exception as e:
+            print(f"   ⚠️ Fehler beim Schreiben von Alert {reference.id}: {e}")
+    return written
+
+def run_price_alert_pass(client=None, scheduler=None):
+    """
+    Ein kompletter Durchlauf über alle Alerts aller User.
+    Alerts werden nach (origin, dest, date) gruppiert, damit jede Route nur einmal gesucht wird.
+    Die Suchen laufen parallel in einem Thread-Pool mit begrenzter Worker-Anzahl;
+    die Funktion kehrt erst zurück, wenn alle Prüfungen abgeschlossen und gespeichert sind.
+    `client` ist standardmäßig der globale Firestore-Client (kann z.B. auf den Emulator zeigen).
+    Mit `scheduler` werden nur fällige Alerts geprüft und danach neu eingeplant.
+    """
+    client = client or db
+    started = time.perf_counter()
+    now = time.time()
+
+    # Erst alle fälligen Alerts einsammeln und nach Route gruppieren, dann parallel prüfen
+    routes = {}
+    alert_count = 0
+    seen_keys = []
+    for user_id, alert_doc in iter_all_alerts(client):
+        seen_keys.append(alert_doc.reference.path)
+        if scheduler and not scheduler.is_due(alert_doc.reference.path, now):
+            continue
+
+        alert_data = alert_doc.to_dict()
+        dest = alert_data.get('dest')
+        if not dest or not alert_data.get('targetPrice'):
+            continue
+        if clean_price(alert_data.get('targetPrice')) is None:
+            print(f"   ⚠️ Ungültiger Zielpreis für {dest}")
+            continue
+
+        routes.setdefault(alert_route_key(alert_data), []).append((user_id, alert_doc, alert_data))
+        alert_count += 1
+
+    stats = Counter()
+    updates = []
+    # Der with-Block wartet, bis alle Futures fertig sind
+    with ThreadPoolExecutor(max_workers=ALERT_CHECK_WORKERS, thread_name_prefix='alert-check') as executor:
+        futures = {executor.submit(check_route_alerts, key, route_alerts): key for key, route_alerts in routes.items()}
+        for future in as_completed(futures):
+            route_stats, route_updates, current_price = future.result()
+            stats.update(route_stats)
+            updates.extend(route_updates)
+
+            # Nächste Prüfung für alle Alerts dieser Route einplanen
+            if scheduler:
+                route_key = futures[future]
+                for _, alert_doc, _ in routes[route_key]:
+                    scheduler.record(alert_doc.reference.path, route_key[2], current_price)
+
+    # Alle Änderungen gebündelt speichern statt einzeln pro Alert
+    written = commit_alert_updates(client, updates)
+
+    if scheduler:
+        scheduler.retain(seen_keys)
+        scheduler.save()
+
+    elapsed = time.perf_counter() - started
+    print(f"🔔 Preisalarm-Durchlauf fertig: {alert_count} Alerts auf {len(routes)} Routen in {elapsed:.1f}s "
+          f"({ALERT_CHECK_WORKERS} Worker, {stats['triggered']} ausgelöst, {stats['error']} Fehler, "
+          f"{written}/{len(updates)} gespeichert)")
+    return {'alerts': alert_count, 'routes': len(routes), 'seconds': elapsed, 'written': written, **stats}
+
 def check_price_alerts():
     """
     Background-Thread, der regelmäßig Preisalarme aller User überprüft
-    und neue Preise in Firestore speichert
+    und neue Preise in Firestore speichert.
+    Jeder Alert hat einen eigenen Fälligkeitszeitpunkt (siehe alert_scheduler.py),
+    der Thread schläft bis zur nächsten Fälligkeit.
     """
+    scheduler = AlertScheduler(ALERT_SCHEDULE_FILE)
+
     while True:
         try:
             print("🔔 Preisalarm-Checker läuft...")
-            users_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').stream()
-
-            for user_doc in users_ref:
-                user_id = user_doc.id
-                user_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(user_id)
-
-                # Hole alle Alerts des Users
-                alerts = user_ref.collection('alerts').stream()
-
-                for alert_doc in alerts:
-                    alert_data = alert_doc.to_dict()
-                    dest = alert_data.get('dest')
-                    target_price = alert_data.get('targetPrice')
-                    last_seen_price = alert_data.get('lastSeenPrice')
-                    notified_at = alert_data.get('notifiedAt')
-
-                    if not dest or not target_price:
-                        continue
-
-                    # Konvertiere zu float mit Bereinigung
-                    target_price = clean_price(target_price)
-                    last_seen_price = clean_price(last_seen_price)
-
-                    if target_price is None:
-                        print(f"   ⚠️ Ungültiger Zielpreis für {dest}")
-                        continue
-
-                    try:
-                        # Suche aktuelle Flugpreise für dieses Ziel
-                        # Verwende einen Standard-Abflugort (z.B. Frankfurt) oder den letzten bekannten
-                        origin = alert_data.get('origin', 'FRA')
-
-                        # Datum: Verwende gespeichertes Datum oder morgen als Fallback
-                        saved_date = alert_data.get('date')
-                        if saved_date:
-                            search_date = saved_date
-                            print(f"      → Verwende gespeichertes Datum: {search_date}")
-                        else:
-                            search_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-                            print(f"      → Kein Datum gespeichert, verwende morgen: {search_date}")
-
-                        # Führe Flugsuche durch
-                        flight_data = [FlightData(date=search_date, from_airport=origin, to_airport=dest)]
-                        passengers = Passengers(adults=1, children=0, infants_in_seat=0, infants_on_lap=0)
-
-                        result = get_flights(
-                            flight_data=flight_data,
-                            trip="one-way",
-                            seat="economy",
-                            passengers=passengers,
-                            fetch_mode="local"
-                        )
-
-                        if result and result.flights and len(result.flights) > 0:
-                            # Günstigster Flug
-                            cheapest = min(result.flights, key=lambda f: clean_price(f.price) or float('inf'))
-                            current_price = clean_price(cheapest.price)
-
-                            if current_price is None:
-                                print(f"   ⚠️ Ungültiger Preis von API für {dest}")
-                                continue
-
-                            # Aktualisiere lastSeenPrice
-                            update_data = {'lastSeenPrice': current_price}
-
-                            # Prüfe, ob Alarm ausgelöst werden soll
-                            if current_price <= target_price:
-                                # Nur benachrichtigen, wenn noch nicht benachrichtigt wurde
-                                # oder der Preis zwischenzeitlich über dem Zielpreis war
-                                should_notify = False
-                                if not notified_at:
-                                    should_notify = True
-                                elif last_seen_price is not None and last_seen_price > target_price:
-                                    should_notify = True
-
-                                if should_notify:
-                                    update_data['notifiedAt'] = datetime.datetime.now().timestamp()
-                                    update_data['triggeredPrice'] = current_price
-                                    print(f"   ✅ Preisalarm für {user_id}: {dest} @ {current_price}€ (Ziel: {target_price}€)")
-                            else:
-                                # Preis über Ziel - reset notifiedAt für erneute Benachrichtigung
-                                if notified_at and last_seen_price is not None and last_seen_price <= target_price:
-                                    update_data['notifiedAt'] = None
-
-                            # Speichere Aktualisierung
-                            alert_doc.reference.update(update_data)
-
-                    except Exception as e:
-                        print(f"   ⚠️ Fehler bei Preischeck für {dest}: {e}")
-                        continue
-
+            run_price_alert_pass(scheduler=scheduler)
         except Exception as e:
             print(f"❌ Fehler im Preisalarm-Checker: {e}")
 
-        # Wartezeit zwischen den Prüfungen (z.B. 1 Stunde = 3600 Sekunden)
-        print(f"💤 Nächste Preisüberprüfung in 1 Stunde...")
-        time.sleep(3600)
+        # Wartezeit bis zum nächsten fälligen Alert, spätestens nach ALERT_CHECK_INTERVAL
+        # (damit neu angelegte Alerts zeitnah erfasst werden)
+        wait = scheduler.seconds_until_next(ALERT_MIN_SLEEP, ALERT_CHECK_INTERVAL)
+        print(f"💤 Nächste Preisüberprüfung in {int(wait // 60)} Minuten...")
+        time.sleep(wait)
 
 # --- Routen ---
 
@@ -222,6 +289,9 @@ def login():
 # Abmeldung
 @app.route('/logout', methods=['POST'])
 def logout():
+    session_cookie = request.cookies.get('session')
+    if session_cookie:
+        session_cache.invalidate(session_cookie)
     response = make_response(jsonify({'status': 'success'}))
     response.set_cookie('session', '', expires=0)
     return response
@@ -229,6 +299,8 @@ def logout():
 
 # --- FIRESTORE API ENDPUNKTE ---
 # Daten abrufen, speichern und löschen für Trips und Alerts
+# Mit ?since=<serverTime des letzten Abrufs>&user=<user aus dem letzten Abruf> kommen nur Änderungen
+# (geänderte Dokumente plus IDs gelöschter Dokumente in 'deleted'), sonst alle Daten (full: true)
 @app.route('/api/data', methods=['GET'])
 def get_user_data():
     user_id, is_authenticated = get_user_id()
@@ -238,13 +310,20 @@ def get_user_data():
         # Bei anonymen Sessions wird auch Firestore verwendet, nur mit anderer ID
         user_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(user_id)
 
-        trips = {doc.id: doc.to_dict() for doc in user_ref.collection('trips').stream()}
-        alerts = [{**doc.to_dict(), 'id': doc.id} for doc in user_ref.collection('alerts').stream()]
+        # Ein Cache eines anderen Users (z.B. nach Login/Logout) wird nie fortgeschrieben
+        key = user_key(user_id)
+        since = request.args.get('since', type=int) if request.args.get('user') == key else None
+        data = load_user_data(user_ref, since)
 
         auth_status = 'authenticated' if is_authenticated else 'anonymous'
-        print(f"📊 Daten geladen für {auth_status} User: {len(trips)} Trips, {len(alerts)} Alerts")
-
-        return jsonify({'trips': trips, 'alerts': alerts, 'isAuthenticated': is_authenticated})
+        if data['full']:
+            print(f"📊 Daten geladen für {auth_status} User: {len(data['trips'])} Trips, {len(data['alerts'])} Alerts")
+        else:
+            deleted = sum(len(ids) for ids in data['deleted'].values())
+            print(f"📊 Änderungen geladen für {auth_status} User: {len(data['trips'])} Trips, "
+                  f"{len(data['alerts'])} Alerts, {deleted} gelöscht")
+
+        return jsonify({**data, 'user': key, 'isAuthenticated': is_authenticated})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -258,14 +337,13 @@ def save_trip():
     trip_content = data.get('data')
 
     try:
-        doc_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(
-            user_id).collection('trips').document(trip_id)
-        doc_ref.set(trip_content)
+        user_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(user_id)
+        saved = save_doc(user_ref, 'trips', trip_id, trip_content)
 
         auth_status = 'authenticated' if is_authenticated else 'anonymous'
         print(f"💾 Trip gespeichert für {auth_status} User: {trip_id}")
 
-        return jsonify({'status': 'success', 'isAuthenticated': is_authenticated})
+        return jsonify({'status': 'success', 'isAuthenticated': is_authenticated, 'updatedAt': saved['updatedAt']})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -275,9 +353,8 @@ def delete_trip(trip_id):
     user_id, is_authenticated = get_user_id()
 
     try:
-        doc_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(
-            user_id).collection('trips').document(trip_id)
-        doc_ref.delete()
+        user_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(user_id)
+        delete_doc(db, user_ref, 'trips', trip_id)
 
         auth_status = 'authenticated' if is_authenticated else 'anonymous'
         print(f"🗑️ Trip gelöscht für {auth_status} User: {trip_id}")
@@ -296,14 +373,13 @@ def save_alert():
     alert_content = data.get('data')
 
     try:
-        doc_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(
-            user_id).collection('alerts').document(alert_id)
-        doc_ref.set(alert_content)
+        user_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(user_id)
+        saved = save_doc(user_ref, 'alerts', alert_id, alert_content)
 
         auth_status = 'authenticated' if is_authenticated else 'anonymous'
         print(f"🔔 Alert gespeichert für {auth_status} User: {alert_id}")
 
-        return jsonify({'status': 'success'})
+        return jsonify({'status': 'success', 'updatedAt': saved['updatedAt']})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -313,9 +389,8 @@ def delete_alert(alert_id):
     user_id, is_authenticated = get_user_id()
 
     try:
-        doc_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(
-            user_id).collection('alerts').document(alert_id)
-        doc_ref.delete()
+        user_ref = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(user_id)
+        delete_doc(db, user_ref, 'alerts', alert_id)
 
         auth_status = 'authenticated' if is_authenticated else 'anonymous'
         print(f"🗑️ Alert gelöscht für {auth_status} User: {alert_id}")
@@ -324,80 +399,158 @@ def delete_alert(alert_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-
-# --- PREISALARM CHECK API ---
-@app.route('/api/check_alerts', methods=['POST'])
-def check_alerts():
-    """Überprüft Preisalarme manuell und gibt Ergebnisse zurück"""
+# Preisverlauf eines Alerts für das Diagramm: /api/alerts/<id>/history?resolution=day&days=90
+# resolution: raw, hour, 6h, day, week oder Sekunden pro Bucket (ohne Angabe: automatisch)
+@app.route('/api/alerts/<alert_id>/history', methods=['GET'])
+def alert_history(alert_id):
     user_id, is_authenticated = get_user_id()
+    if not flight_history:
+        return jsonify({'success': False, 'error': 'Flug-Historie ist deaktiviert'}), 503
 
     try:
-        data = request.json
-        alerts = data.get('alerts', [])
+        alert_doc = db.collection('artifacts').document('travelfolio-3d-001').collection('users').document(
+            user_id).collection('alerts').document(alert_id).get()
+        if not alert_doc.exists:
+            return jsonify({'success': False, 'error': 'Alert nicht gefunden'}), 404
+        alert_data = alert_doc.to_dict()
+        if not alert_data.get('dest'):
+            return jsonify({'success': False, 'error': 'Alert hat kein Ziel'}), 400
+
+        origin, dest, search_date = alert_route_key(alert_data)
+        days = request.args.get('days', type=int)
+        since = time.time() - days * 86400 if days else None
+        try:
+            series = flight_history.price_series(origin, dest, search_date, since=since,
+                                                 resolution=request.args.get('resolution'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Ungültige Auflösung'}), 400
+
+        return jsonify({'success': True, 'id': alert_id, 'origin': origin, 'destination': dest,
+                        'date': search_date, 'targetPrice': clean_price(alert_data.get('targetPrice')), **series})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        results = []
-        for alert in alerts:
-            dest = alert.get('dest')
-            target_price = alert.get('targetPrice')
-            origin = alert.get('origin', 'FRA')
+# --- PREISALARM CHECK API ---
+def iter_manual_alert_checks(alerts, max_workers=None):
+    """
+    Prüft die übergebenen Alerts parallel und liefert pro Alert ein Ergebnis, sobald seine Route fertig ist.
+    Alerts mit gleicher Route teilen sich eine Suche; noch gültige Preise aus Cache/Historie werden
+    wiederverwendet statt neu gescrapt.
+    """
+    routes = {}
+    for alert in alerts:
+        target_price = clean_price(alert.get('targetPrice'))
+        if not alert.get('dest') or target_price is None:
+            continue
+        routes.setdefault(alert_route_key(alert), []).append((alert, target_price))
 
-            if not dest or not target_price:
-                continue
+    if not routes:
+        return
 
-            # Konvertiere zu float mit Bereinigung
-            target_price = clean_price(target_price)
-            if target_price is None:
-                continue
+    def check_route(route_key):
+        return check_alert_route(*route_key, fresh=False)
 
+    executor = ThreadPoolExecutor(max_workers=min(max_workers or MANUAL_ALERT_WORKERS, len(routes)),
+                                  thread_name_prefix='manual-alert-check')
+    try:
+        futures = {executor.submit(check_route, route_key): route_key for route_key in routes}
+        for future in as_completed(futures):
+            origin, dest, search_date = futures[future]
             try:
-                # Datum: Verwende gespeichertes Datum oder morgen als Fallback
-                saved_date = alert.get('date')
-                if saved_date:
-                    search_date = saved_date
-                    print(f"      → Verwende gespeichertes Datum: {search_date}")
-                else:
-                    search_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
-                    print(f"      → Kein Datum gespeichert, verwende morgen: {search_date}")
-
-                # Flugsuche
-                flight_data = [FlightData(date=search_date, from_airport=origin, to_airport=dest)]
-                passengers = Passengers(adults=1, children=0, infants_in_seat=0, infants_on_lap=0)
-
-                result = get_flights(
-                    flight_data=flight_data,
-                    trip="one-way",
-                    seat="economy",
-                    passengers=passengers,
-                    fetch_mode="local"
-                )
-
-                if result and result.flights and len(result.flights) > 0:
-                    cheapest = min(result.flights, key=lambda f: clean_price(f.price) or float('inf'))
-                    current_price = clean_price(cheapest.price)
-
-                    if current_price is not None:
-                        results.append({
-                            'id': alert.get('id'),
-                            'dest': dest,
-                            'currentPrice': current_price,
-                            'targetPrice': target_price,
-                            'triggered': current_price <= target_price
-                        })
-                        print(f"   ✅ Preis gefunden für {origin} nach {dest}: {current_price}€ (Ziel: {target_price}€)")
+                current_price = future.result()
+                error = None if current_price is not None else 'Keine Flüge gefunden'
+            except Exception as e:
+                current_price, error = None, str(e)
+
+            if error:
+                print(f"   ⚠️ Alert-Check {origin} → {dest} am {search_date}: {error}")
+            else:
+                print(f"   ✅ Preis gefunden für {origin} nach {dest}: {current_price}€")
+
+            for alert, target_price in routes[(origin, dest, search_date)]:
+                if error:
+                    yield {'id': alert.get('id'), 'dest': dest, 'error': error}
                 else:
-                    print(f"   ⚠️ Keine Flüge gefunden für {dest}")
+                    yield {
+                        'id': alert.get('id'),
+                        'dest': dest,
+                        'currentPrice': current_price,
+                        'targetPrice': target_price,
+                        'triggered': current_price <= target_price
+                    }
+    finally:
+        # Bei Verbindungsabbruch keine weiteren Suchen mehr starten
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# Body: {"alerts": [...], "stream": true}
+# Ohne "stream" kommt eine JSON-Antwort mit allen Ergebnissen, mit "stream": true ein NDJSON-Stream
+# (eine Zeile pro Alert, sobald geprüft, am Ende eine Zusammenfassung), mit Accept: text/event-stream SSE.
+@app.route('/api/check_alerts', methods=['POST'])
+def check_alerts():
+    """Überprüft Preisalarme manuell und gibt Ergebnisse zurück"""
+    user_id, is_authenticated = get_user_id()
 
-            except Exception as e:
-                print(f"   ❌ Fehler bei Alert-Check für {dest}: {e}")
-                continue
+    data = request.get_json(silent=True) or {}
+    alerts = data.get('alerts', [])
+    if not isinstance(alerts, list):
+        return jsonify({'success': False, 'error': 'alerts muss eine Liste sein'}), 400
 
-        return jsonify({'success': True, 'results': results})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    skipped = max(0, len(alerts) - MANUAL_ALERT_LIMIT)
+    checks = iter_manual_alert_checks(alerts[:MANUAL_ALERT_LIMIT])
+    print(f"🔔 Manuelle Prüfung von {min(len(alerts), MANUAL_ALERT_LIMIT)} Alerts ({skipped} übersprungen)")
+
+    use_sse = 'text/event-stream' in request.headers.get('Accept', '')
+    if not data.get('stream') and not use_sse:
+        try:
+            results, errors = [], []
+            for result in checks:
+                (errors if 'error' in result else results).append(result)
+            return jsonify({'success': True, 'results': results, 'errors': errors, 'skipped': skipped})
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    def stream():
+        started = time.perf_counter()
+        checked = 0
+        for result in checks:
+            checked += 1
+            yield (f"event: result\ndata: {json.dumps(result)}\n\n" if use_sse else json.dumps(result) + "\n")
+        summary = {'done': True, 'checked': checked, 'skipped': skipped,
+                   'seconds': round(time.perf_counter() - started, 1)}
+        yield f"event: done\ndata: {json.dumps(summary)}\n\n" if use_sse else json.dumps(summary) + "\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 # --- FLUGSUCHE ---
+def run_trip_search(trip, legs, pass_data, options=None):
+    """Hin-/Rückflug oder Gabelflug: Teilstrecken parallel suchen und zu Reiseverläufen kombinieren"""
+    legs = [(resolve_iata(origin), resolve_iata(destination), date) for origin, destination, date in legs]
+    result = search_itinerary(trip, legs, build_passengers(pass_data), filters=options['filters'] if options else None)
+    result['coords'] = airport_coords(*{code for leg in legs for code in leg[:2]})
+    return result
+
+def run_nearby_search(origin, destination, departure_date, pass_data, nearby, options=None):
+    """One-Way-Suche inklusive der Flughäfen im Umkreis (`nearby` ist bereits durch nearby_options geprüft)"""
+    origin = resolve_iata(origin)
+    destination = resolve_iata(destination)
+    result = search_nearby(origin, destination, departure_date, build_passengers(pass_data),
+                           options=options, **nearby)
+    result['coords'] = airport_coords(*result['airports']['origin'], *result['airports']['destination'])
+    print(f"📍 Umkreis-Suche {origin} → {destination}: {len(result['pairs'])} Kombinationen, "
+          f"{len(result['flights'])} Flüge")
+    return result
+
 # Flug suchen
+# Mit "nearby": true (oder {"radius": 150, "maxAirports": 3, "maxPairs": 6}) werden auch Flughäfen
+# im Umkreis von Abflug- und Zielort gesucht (nur one-way)
+# "trip" ist 'one-way' (Standard), 'round-trip' (mit returnDate) oder 'multi-city' (mit legs)
+# Optional serverseitig filtern/sortieren: "filters": {"maxStops", "maxPrice", "maxDuration", "departAfter",
+# "departBefore"}, "sort": 'price' | 'duration' | 'departure', "order": 'asc' | 'desc'
+# (bei Hin-/Rückflug und Gabelflug gelten die Filter für jede Teilstrecke)
+# Mit {"async": true} im Body (oder ?async=1) wird sofort eine Job-ID zurückgegeben,
+# das Ergebnis gibt es dann über /api/search/<job_id> (Polling) oder /api/search/<job_id>/events (SSE)
 @app.route('/api/search', methods=['POST'])
 def search():
     data = request.get_json()
@@ -405,63 +558,221 @@ def search():
     destination = str(data.get('destination', '').upper())
     departure_date = str(data.get('date'))
     pass_data = data.get('passengers', {})
+    trip = data.get('trip', 'one-way')
+
+    try:
+        options = result_options(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if trip == 'one-way':
+        if not all([origin, destination, departure_date]):
+            return jsonify({'error': 'Fehlende Parameter'}), 400
+        if data.get('nearby'):
+            try:
+                nearby = nearby_options(data['nearby'])
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            search_fn, search_args = run_nearby_search, (origin, destination, departure_date, pass_data,
+                                                         nearby, options)
+        else:
+            search_fn, search_args = search_flights, (origin, destination, departure_date, pass_data, options)
+    else:
+        try:
+            search_fn, search_args = run_trip_search, (trip, trip_legs(trip, data), pass_data, options)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+    if data.get('async') or request.args.get('async'):
+        job = search_jobs.submit(search_fn, *search_args)
+        print(f"🧾 Such-Job gestartet: {job.id} ({trip})")
+        return jsonify({
+            'success': True,
+            'jobId': job.id,
+            'status': job.status,
+            'poll': f"/api/search/{job.id}",
+            'events': f"/api/search/{job.id}/events"
+        }), 202
+
+    try:
+        return jsonify(search_fn(*search_args))
+    except Exception as e:
+        print(e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# Flexible Datumssuche: Preis-Kalender (günstigster Preis pro Tag)
+# Body: origin, destination, passengers + Suchfenster (date & flex, start & end oder month)
+@app.route('/api/search/range', methods=['POST'])
+def search_range():
+    data = request.get_json()
+    origin = str(data.get('origin', '').upper())
+    destination = str(data.get('destination', '').upper())
 
-    if not all([origin, destination, departure_date]):
+    if not all([origin, destination]):
         return jsonify({'error': 'Fehlende Parameter'}), 400
 
     try:
-        passengers = Passengers(
-            adults=int(pass_data.get('adults', 1)),
-            children=int(pass_data.get('children', 0)),
-            infants_in_seat=int(pass_data.get('infants', 0)),
-            infants_on_lap=0
-        )
+        dates = date_window(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    try:
+        origin = resolve_iata(origin)
+        destination = resolve_iata(destination)
+        passengers = build_passengers(data.get('passengers', {}))
 
-        # IATA Suche falls nötig
-        if len(origin) != 3:
-            search_res = search_airport(origin)
-            if search_res:
-                origin = search_res[0].value if hasattr(search_res[0], 'value') else search_res[0]
-        if len(destination) != 3:
-            search_res = search_airport(destination)
-            if search_res:
-                destination = search_res[0].value if hasattr(search_res[0], 'value') else search_res[0]
-
-        flight_data = [FlightData(date=departure_date, from_airport=origin, to_airport=destination)]
-        result = get_flights(flight_data=flight_data, trip="one-way", seat="economy", passengers=passengers,
-                             fetch_mode="local")
-
-        flights_list = []
-        if result and result.flights:
-            for flight in result.flights:
-                flights_list.append({
-                    'airline': flight.name,
-                    'price': flight.price,
-                    'departure': flight.departure,
-                    'arrival': flight.arrival,
-                    'duration': flight.duration,
-                    'stops': flight.stops,
-                })
-
-        coords = {}
-
-        if origin in airports_db:
-            apt = airports_db[origin]
-            coords[origin] = {'lat': apt['lat'], 'lon': apt['lon']}
-
-        if destination in airports_db:
-            apt = airports_db[destination]
-            coords[destination] = {'lat': apt['lat'], 'lon': apt['lon']}
-
-        print(f" Web-API: Koordinaten gefunden: {list(coords.keys())}")
-
-        return jsonify({'success': True, 'origin': origin, 'destination': destination, 'flights': flights_list, 'coords': coords})
+        started = time.perf_counter()
+        result = build_price_calendar(origin, destination, dates, passengers)
+        result['coords'] = airport_coords(origin, destination)
+        print(f"📅 Preis-Kalender {origin} → {destination}: {len(dates)} Tage in {time.perf_counter() - started:.1f}s")
+
+        return jsonify(result)
     except Exception as e:
         print(e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# "Überall hin"-Suche: günstigster Preis von einem Abflugort zu vielen Zielen
+# Body: origin, date, passengers + destinations (Liste) oder country/region (Filter auf airports_db), limit
+# Antwort als NDJSON-Stream (eine Zeile pro Ziel, sobald gefunden, am Ende eine Zusammenfassung);
+# mit "stream": false kommt eine einzige, nach Preis sortierte JSON-Antwort
+@app.route('/api/search/anywhere', methods=['POST'])
+def search_anywhere():
+    data = request.get_json()
+    origin = str(data.get('origin', '').upper())
+    departure_date = str(data.get('date', ''))
+
+    if not all([origin, departure_date]):
+        return jsonify({'error': 'Fehlende Parameter'}), 400
+
+    try:
+        origin = resolve_iata(origin)
+        destinations = select_destinations(
+            airports_db, origin,
+            destinations=data.get('destinations'),
+            country=data.get('country'),
+            region=data.get('region'),
+            limit=data.get('limit', 25)
+        )
+        passengers = build_passengers(data.get('passengers', {}))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    fares = iter_cheapest_fares(origin, destinations, departure_date, passengers)
+    print(f"🌍 Überall-hin-Suche ab {origin} am {departure_date}: {len(destinations)} Ziele")
+
+    def with_coords(fare):
+        return {**fare, 'coords': airport_coords(fare['destination']).get(fare['destination'])}
+
+    if data.get('stream', True) is False:
+        results = sorted((with_coords(fare) for fare in fares),
+                         key=lambda f: f['price'] if f['price'] is not None else float('inf'))
+        return jsonify({'success': True, 'origin': origin, 'results': results, 'coords': airport_coords(origin)})
+
+    def stream():
+        started = time.perf_counter()
+        yield json.dumps({'origin': origin, 'coords': airport_coords(origin), 'destinations': destinations}) + "\n"
+        found = 0
+        for fare in fares:
+            found += fare['price'] is not None
+            yield json.dumps(with_coords(fare)) + "\n"
+        yield json.dumps({'done': True, 'found': found, 'seconds': round(time.perf_counter() - started, 1)}) + "\n"
+
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Status/Ergebnis einer Hintergrund-Suche abfragen (Polling)
+@app.route('/api/search/<job_id>', methods=['GET'])
+def search_job_status(job_id):
+    job = search_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job nicht gefunden'}), 404
+    return jsonify(job.to_dict())
+
+# Ergebnis einer Hintergrund-Suche per Server-Sent Events
+@app.route('/api/search/<job_id>/events', methods=['GET'])
+def search_job_events(job_id):
+    job = search_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job nicht gefunden'}), 404
+
+    def stream():
+        yield f"event: status\ndata: {json.dumps({'jobId': job.id, 'status': job.status})}\n\n"
+        # Keep-Alive-Kommentare, bis der Job fertig ist (hält Proxies die Verbindung offen)
+        while not job.done.wait(timeout=15):
+            yield ": keep-alive\n\n"
+        event = 'result' if job.status == 'done' else 'error'
+        yield f"event: {event}\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Autocomplete für Flughäfen: /api/airports/suggest?q=frankf&limit=8
+@app.route('/api/airports/suggest', methods=['GET'])
+def suggest_airports():
+    query = request.args.get('q', '')
+    try:
+        limit = max(1, min(int(request.args.get('limit', 8)), 50))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit muss eine ganze Zahl sein'}), 400
+    return jsonify({'success': True, 'results': get_airport_index().suggest(query, limit)})
+
+# Koordinaten für den Globus: /api/airports/coords?codes=FRA,JFK (höchstens 100 Codes)
+@app.route('/api/airports/coords', methods=['GET'])
+def airports_coords():
+    codes = [code.strip().upper() for code in request.args.get('codes', '').split(',') if code.strip()]
+    return jsonify({'success': True, 'coords': airport_coords(*codes[:100])})
+
+# Flughäfen in der Nähe: /api/airports/nearby?lat=50.03&lon=8.57&k=5 oder ...&radius=150 (km)
+@app.route('/api/airports/nearby', methods=['GET'])
+def airports_nearby():
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        k = min(int(request.args.get('k', 5)), 100)
+        radius = request.args.get('radius', type=float)
+    except (KeyError, ValueError):
+        return jsonify({'success': False, 'error': 'lat und lon werden benötigt'}), 400
+
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'success': False, 'error': 'Ungültige Koordinaten'}), 400
+
+    return jsonify({'success': True, 'results': nearby_airports(lat, lon, k=k, radius_km=radius)})
+
+# Preisverlauf einer Route aus der Flug-Historie (ohne neuen Scrape)
+# /api/search/history?origin=FRA&destination=JFK&date=2025-06-01&adults=1&days=30
+@app.route('/api/search/history', methods=['GET'])
+def search_history():
+    if not flight_history:
+        return jsonify({'success': False, 'error': 'Flug-Historie ist deaktiviert'}), 503
+
+    origin = request.args.get('origin', '').strip().upper()
+    destination = request.args.get('destination', '').strip().upper()
+    date = request.args.get('date', '').strip()
+    if not origin or not destination or not date:
+        return jsonify({'success': False, 'error': 'origin, destination und date werden benötigt'}), 400
+
+    try:
+        pax = passenger_key(build_passengers(request.args))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    days = request.args.get('days', type=int)
+    since = time.time() - days * 86400 if days else None
+
+    points = flight_history.price_trend(origin, destination, date, passengers=pax, since=since)
+    return jsonify({'success': True, 'origin': origin, 'destination': destination, 'date': date, 'points': points})
+
+# Cache-Statistiken (Hit/Miss) der Flugsuche
+@app.route('/api/search/cache', methods=['GET'])
+def search_cache_stats():
+    return jsonify({**flight_cache.stats(), 'inFlight': search_flight.in_flight(), 'coalesced': search_flight.coalesced,
+                    'browserPool': browser_pool.stats, 'history': flight_history.stats() if flight_history else None,
+                    'searches': search_stats.snapshot(), 'sessions': session_cache.stats()})
+
 
 if __name__ == '__main__':
+    # Browser-Pool vorwärmen, damit die erste Suche keinen Kaltstart hat
+    browser_pool.warm_up()
+
     # Starte Preisalarm-Checker-Thread im Hintergrund
     if db:
         price_checker_thread = threading.Thread(target=check_price_alerts, daemon=True)
@@ -0,0 +1,122 @@
+# "Flughäfen in der Nähe"-Suche (Web-App)
+# Erweitert Abflug- und Zielort um alle Flughäfen im Umkreis (z.B. FRA -> FRA, HHN, STR),
+# sucht die Kombinationen parallel (begrenzt durch ein Budget) und liefert eine gemeinsame,
+# nach Preis sortierte Ergebnisliste mit dem jeweils verwendeten Flughafen.
+import os
+import math
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from airport_geo import get_geo_index
+from airport_store import airport_store
+from flight_results import FlightTable, apply_options
+from search_engine import find_flights
+
+DEFAULT_RADIUS_KM = 150
+MAX_RADIUS_KM = 500
+DEFAULT_AIRPORTS_PER_SIDE = 3  # Inklusive des ursprünglichen Flughafens
+DEFAULT_MAX_PAIRS = 6  # Budget: maximale Anzahl an Suchen pro Anfrage
+NEARBY_WORKERS = int(os.environ.get('TRAVELFOLIO_NEARBY_WORKERS', 3))
+
+
+def expand_airport(code, radius_km, max_airports):
+    """Flughafen plus die nächstgelegenen im Umkreis: [(code, distanz_km)], Original zuerst"""
+    apt = airport_store.coords(code)
+    if not apt:
+        return [(code, 0.0)]
+
+    expanded = [(code, 0.0)]
+    for distance, other, _, _ in get_geo_index().within_radius(apt['lat'], apt['lon'], radius_km):
+        if other != code and len(expanded) < max_airports:
+            expanded.append((other, distance))
+    return expanded
+
+
+def _option(options, key, default, cast, name):
+    """Zahl aus den Optionen; Wahrheitswerte, Text oder NaN -> ValueError (400 statt 500)"""
+    value = options.get(key, default)
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        value = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'{name} muss eine Zahl sein')
+    if math.isnan(value):
+        raise ValueError(f'{name} muss eine Zahl sein')
+    return value
+
+
+def nearby_options(options):
+    """
+    Optionen aus dem Request ('nearby': true oder {'radius': 150, 'maxAirports': 3, 'maxPairs': 6}).
+    Wird vor dem Start der Suche aufgerufen; ungültige Werte werfen ValueError.
+    """
+    options = options if isinstance(options, dict) else {}
+    radius_km = _option(options, 'radius', DEFAULT_RADIUS_KM, float, 'radius')
+    max_airports = _option(options, 'maxAirports', DEFAULT_AIRPORTS_PER_SIDE, int, 'maxAirports')
+    max_pairs = _option(options, 'maxPairs', DEFAULT_MAX_PAIRS, int, 'maxPairs')
+    if radius_km < 0:
+        raise ValueError('radius darf nicht negativ sein')
+    if max_airports < 1 or max_pairs < 1:
+        raise ValueError('maxAirports und maxPairs müssen mindestens 1 sein')
+    return {
+        'radius_km': min(radius_km, MAX_RADIUS_KM),
+        'max_airports': max_airports,
+        'max_pairs': max_pairs,
+    }
+
+
+def search_nearby(origin, destination, date, passengers, radius_km=DEFAULT_RADIUS_KM,
+                  max_airports=DEFAULT_AIRPORTS_PER_SIDE, max_pairs=DEFAULT_MAX_PAIRS, options=None, max_workers=None):
+    """
+    Sucht alle Kombinationen aus Abflug- und Zielflughäfen im Umkreis.
+    Bei mehr Kombinationen als `max_pairs` werden die mit der geringsten Gesamtentfernung
+    zu den ursprünglich gewünschten Flughäfen bevorzugt.
+    `options` (siehe flight_results.result_options) filtert/sortiert die gemeinsame Liste,
+    ohne Sortierung wird nach Preis sortiert.
+    """
+    origins = expand_airport(origin, radius_km, max_airports)
+    destinations = expand_airport(destination, radius_km, max_airports)
+
+    pairs = sorted(
+        ((o, d, o_dist + d_dist) for (o, o_dist), (d, d_dist) in itertools.product(origins, destinations) if o != d),
+        key=lambda pair: pair[2]
+    )[:max_pairs]
+
+    def search_pair(pair):
+        pair_origin, pair_dest, detour_km = pair
+        try:
+            table = find_flights(pair_origin, pair_dest, date, passengers, purpose='nearby')
+        except Exception as e:
+            print(f"   ⚠️ Fehler bei Umkreis-Suche {pair_origin} → {pair_dest}: {e}")
+            return pair, None, str(e)
+        return pair, table, None
+
+    with ThreadPoolExecutor(max_workers=max_workers or NEARBY_WORKERS, thread_name_prefix='nearby-search') as executor:
+        pair_results = list(executor.map(search_pair, pairs))
+
+    found = [(pair, pair_table) for pair, pair_table, _ in pair_results if pair_table is not None]
+    table = FlightTable.concat(
+        [pair_table for _, pair_table in found],
+        extras=[{'originAirport': o, 'destinationAirport': d, 'detourKm': round(detour_km, 1)}
+                for (o, d, detour_km), _ in found]
+    )
+    if not (options and options['sort']):
+        table = table.sort('price')
+    merged = apply_options(table, options).to_dicts()
+
+    return {
+        'success': True,
+        'origin': origin,
+        'destination': destination,
+        'flights': merged,
+        'pairs': [
+            {'origin': o, 'destination': d, 'flights': len(table) if table is not None else 0,
+             **({'error': error} if error else {})}
+            for (o, d, _), table, error in pair_results
+        ],
+        'airports': {
+            'origin': [code for code, _ in origins],
+            'destination': [code for code, _ in destinations],
+        },
+    }
@@ -0,0 +1,99 @@
+# Flexible Datumssuche (Web-App und Desktop-App)
+# Sucht eine Route für mehrere Tage parallel und liefert einen Preis-Kalender
+# mit dem günstigsten Preis pro Tag. Bereits gecachte Tage werden nicht erneut gescrapt.
+import os
+import calendar
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from search_engine import find_flights
+
+MAX_RANGE_DAYS = 31
+RANGE_WORKERS = int(os.environ.get('TRAVELFOLIO_RANGE_WORKERS', 3))  # Max. gleichzeitige Tages-Suchen
+
+
+def _parse_date(value, name, fmt='%Y-%m-%d'):
+    """Datum aus dem Suchfenster; falscher Typ oder falsches Format -> ValueError (400 statt 500)"""
+    label = fmt.replace('%Y', 'YYYY').replace('%m', 'MM').replace('%d', 'DD')
+    if not isinstance(value, str):
+        raise ValueError(f'{name} muss ein Datum ({label}) sein')
+    try:
+        return datetime.datetime.strptime(value, fmt).date()
+    except ValueError:
+        raise ValueError(f'{name} muss ein Datum ({label}) sein')
+
+
+def date_window(window):
+    """
+    Ermittelt die Liste der Tage (YYYY-MM-DD) aus einem Suchfenster. Unterstützt:
+      {'date': '2025-06-10', 'flex': 3}            -> ±3 Tage um das Datum (max. ±MAX_RANGE_DAYS // 2)
+      {'start': '2025-06-01', 'end': '2025-06-14'} -> Zeitraum (inklusive)
+      {'month': '2025-06'}                         -> ganzer Monat
+    Vergangene Tage werden ausgelassen, maximal MAX_RANGE_DAYS Tage.
+    """
+    if window.get('month'):
+        start = _parse_date(window['month'], 'month', '%Y-%m')
+        end = start.replace(day=calendar.monthrange(start.year, start.month)[1])
+    elif window.get('start') and window.get('end'):
+        start = _parse_date(window['start'], 'start')
+        end = _parse_date(window['end'], 'end')
+    elif window.get('date'):
+        center = _parse_date(window['date'], 'date')
+        try:
+            flex = int(window.get('flex', 3))
+        except (TypeError, ValueError):
+            raise ValueError('flex muss eine ganze Zahl sein')
+        if flex < 0:
+            raise ValueError('flex darf nicht negativ sein')
+        # Vor dem Rechnen begrenzen (sehr große Werte sprengen timedelta), Fenster bleibt um das Datum zentriert
+        flex = min(flex, MAX_RANGE_DAYS // 2)
+        try:
+            start = center - datetime.timedelta(days=flex)
+            end = center + datetime.timedelta(days=flex)
+        except OverflowError:
+            raise ValueError('Datum liegt außerhalb des gültigen Bereichs')
+    else:
+        raise ValueError('Suchfenster benötigt date (+flex), start/end oder month')
+
+    if end < start:
+        raise ValueError('Enddatum liegt vor dem Startdatum')
+
+    start = max(start, datetime.date.today())
+    count = min((end - start).days + 1, MAX_RANGE_DAYS)
+    return [(start + datetime.timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(count)]
+
+
+def build_price_calendar(origin, destination, dates, passengers, max_workers=None):
+    """Sucht alle Tage parallel (begrenzt auf max_workers) und gibt den Preis-Kalender zurück"""
+    def search_day(day):
+        try:
+            table = find_flights(origin, destination, day, passengers, purpose='calendar')
+        except Exception as e:
+            print(f"   ⚠️ Fehler bei Tages-Suche {origin} → {destination} am {day}: {e}")
+            return {'date': day, 'price': None, 'error': str(e)}
+
+        if not len(table):
+            return {'date': day, 'price': None, 'flights': 0}
+
+        cheapest = table.cheapest()
+        return {
+            'date': day,
+            'price': cheapest['priceValue'] if cheapest else None,
+            'airline': cheapest['airline'] if cheapest else None,
+            'departure': cheapest['departure'] if cheapest else None,
+            'flights': len(table),
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers or RANGE_WORKERS, thread_name_prefix='range-search') as executor:
+        calendar = list(executor.map(search_day, dates))
+
+    priced = [day for day in calendar if day.get('price') is not None]
+    cheapest_day = min(priced, key=lambda d: d['price']) if priced else None
+
+    return {
+        'success': True,
+        'origin': origin,
+        'destination': destination,
+        'calendar': calendar,
+        'cheapest': cheapest_day,
+    }
@@ -0,0 +1,230 @@
+# Gemeinsamer Such-Kern für Web-App (main.py) und Desktop-App (desktop.py)
+# Preis-Bereinigung, Passagiere, IATA-Auflösung, der eigentliche Flugsuche-Aufruf und das
+# Ergebnis-Format für das Frontend gibt es nur noch hier. Alle Suchpfade (Suche, Preis-Kalender,
+# "Überall hin", Reiseverläufe, Umkreis, Preisalarme) laufen über find_flights(), damit
+# Cache, Browser-Pool, Historie und Zeitmessung überall gleich greifen.
+import re
+import time
+import datetime
+import threading
+
+from fast_flights import FlightData, Passengers, search_airport
+
+from airport_index import get_airport_index
+from airport_store import airport_store
+from flight_cache import cached_get_flights, coalesced_get_flights
+from flight_history import flight_history
+from flight_results import FlightTable, apply_options
+
+DEFAULT_ORIGIN = 'FRA'  # Abflugort für Preisalarme ohne gespeicherten Abflugort
+
+
+# Hilfsfunktion zum Bereinigen von Preisen
+def clean_price(price_value):
+    """
+    Konvertiert Preiswerte zu float, entfernt €-Zeichen, Kommas, etc.
+    Beispiele: '€1024' -> 1024.0, '1,234.56' -> 1234.56, '1024' -> 1024.0
+    """
+    if price_value is None:
+        return None
+
+    # Falls bereits eine Zahl, direkt zurückgeben
+    if isinstance(price_value, (int, float)):
+        return float(price_value)
+
+    # String-Verarbeitung
+    if isinstance(price_value, str):
+        # Entferne Währungssymbole und Leerzeichen
+        cleaned = re.sub(r'[€$£¥\s]', '', price_value)
+        # Entferne Tausendertrennzeichen (Komma)
+        cleaned = cleaned.replace(',', '')
+        try:
+            return float(cleaned)
+        except (ValueError, TypeError):
+            return None
+
+    return None
+
+
+def build_passengers(pass_data=None):
+    """Passengers aus dem Frontend-Format {'adults': 2, 'children': 1, 'infants': 0}"""
+    pass_data = pass_data or {}
+    return Passengers(
+        adults=int(pass_data.get('adults', 1)),
+        children=int(pass_data.get('children', 0)),
+        infants_in_seat=int(pass_data.get('infants', 0)),
+        infants_on_lap=0
+    )
+
+
+def resolve_iata(query):
+    """IATA-Code für eine Eingabe (z.B. 'Frankfurt' -> 'FRA'), zuerst über den lokalen Index"""
+    if len(query) == 3:
+        return query
+    code = get_airport_index().resolve(query)
+    if code:
+        return code
+    # Fallback: fast-flights Suche
+    search_res = search_airport(query)
+    if search_res:
+        return search_res[0].value if hasattr(search_res[0], 'value') else search_res[0]
+    return query
+
+
+def airport_coords(*codes):
+    """Koordinaten der Flughäfen für den Globus"""
+    coords = {}
+    for code in codes:
+        apt = airport_store.coords(code)
+        if apt:
+            coords[code] = apt
+    return coords
+
+
+def alert_route_key(alert_data):
+    """
+    Routen-Schlüssel (origin, dest, date) eines Alerts.
+    Alerts mit gleichem Schlüssel teilen sich eine Flugsuche.
+    """
+    # Verwende einen Standard-Abflugort (z.B. Frankfurt) oder den letzten bekannten
+    origin = str(alert_data.get('origin') or DEFAULT_ORIGIN).strip().upper()
+    dest = str(alert_data.get('dest')).strip().upper()
+
+    # Datum: Verwende gespeichertes Datum oder morgen als Fallback
+    search_date = alert_data.get('date')
+    if not search_date:
+        search_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+
+    return origin, dest, search_date
+
+
+def apply_alert_price(user_id, alert_data, current_price):
+    """
+    Wertet einen Preisalarm gegen den aktuellen Preis aus (Preisalarm-Checker von Web- und Desktop-App).
+    Gibt (status, update_data) zurück, status ist 'triggered' oder 'updated'
+    """
+    dest = alert_data.get('dest')
+    target_price = clean_price(alert_data.get('targetPrice'))
+    last_seen_price = clean_price(alert_data.get('lastSeenPrice'))
+    notified_at = alert_data.get('notifiedAt')
+
+    # Aktualisiere lastSeenPrice
+    update_data = {'lastSeenPrice': current_price}
+    status = 'updated'
+
+    # Prüfe, ob Alarm ausgelöst werden soll
+    if current_price <= target_price:
+        # Nur benachrichtigen, wenn noch nicht benachrichtigt wurde
+        # oder der Preis zwischenzeitlich über dem Zielpreis war
+        should_notify = False
+        if not notified_at:
+            should_notify = True
+        elif last_seen_price is not None and last_seen_price > target_price:
+            should_notify = True
+
+        if should_notify:
+            update_data['notifiedAt'] = datetime.datetime.now().timestamp()
+            update_data['triggeredPrice'] = current_price
+            status = 'triggered'
+            print(f"   ✅ Preisalarm für {user_id}: {dest} @ {current_price}€ (Ziel: {target_price}€)")
+    else:
+        # Preis über Ziel - reset notifiedAt für erneute Benachrichtigung
+        if notified_at and last_seen_price is not None and last_seen_price <= target_price:
+            update_data['notifiedAt'] = None
+
+    return status, update_data
+
+
+class SearchStats:
+    """Zähler und Laufzeiten aller Flugsuchen, getrennt nach Zweck (search, alert, calendar, ...)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_purpose = {}
+
+    def record(self, purpose, seconds, error=False):
+        with self._lock:
+            entry = self._by_purpose.setdefault(purpose, {'calls': 0, 'errors': 0, 'seconds': 0.0, 'maxSeconds': 0.0})
+            entry['calls'] += 1
+            entry['errors'] += int(error)
+            entry['seconds'] += seconds
+            entry['maxSeconds'] = max(entry['maxSeconds'], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                purpose: {**entry, 'seconds': round(entry['seconds'], 3), 'maxSeconds': round(entry['maxSeconds'], 3),
+                          'avgSeconds': round(entry['seconds'] / entry['calls'], 3) if entry['calls'] else 0.0}
+                for purpose, entry in self._by_purpose.items()
+            }
+
+
+search_stats = SearchStats()
+
+
+def find_flights(origin, destination, date, passengers=None, fresh=False, purpose='search', before_scrape=None):
+    """
+    Einziger Einstiegspunkt für One-Way-Flugsuchen, gibt eine FlightTable zurück.
+    Standardmäßig aus Cache/Historie, mit `fresh=True` immer ein aktueller Scrape
+    (gleichzeitige identische Suchen teilen sich trotzdem einen Scrape, z.B. für Preisalarme).
+    `purpose` dient nur der Statistik, `before_scrape` wird nur vor einem echten Scrape aufgerufen.
+    """
+    get_flights = coalesced_get_flights if fresh else cached_get_flights
+    flight_data = [FlightData(date=date, from_airport=origin, to_airport=destination)]
+
+    started = time.perf_counter()
+    try:
+        result = get_flights(flight_data=flight_data, trip="one-way", seat="economy",
+                             passengers=passengers or build_passengers(), fetch_mode="local",
+                             before_scrape=before_scrape)
+    except Exception:
+        search_stats.record(purpose, time.perf_counter() - started, error=True)
+        raise
+
+    elapsed = time.perf_counter() - started
+    search_stats.record(purpose, elapsed)
+    table = FlightTable.from_result(result)
+    print(f"⏱️ {origin} → {destination} am {date} ({purpose}): {len(table)} Flüge in {elapsed:.2f}s")
+    return table
+
+
+def search_flights(origin, destination, date, pass_data, options=None):
+    """
+    Flugsuche im Antwortformat des Frontends (Web-API und Desktop-SearchWorker).
+    `options` aus result_options() filtert und sortiert die Flüge serverseitig.
+    """
+    origin = resolve_iata(origin)
+    destination = resolve_iata(destination)
+
+    table = find_flights(origin, destination, date, build_passengers(pass_data))
+    flights_list = apply_options(table, options).to_dicts()
+    coords = airport_coords(origin, destination)
+
+    return {'success': True, 'origin': origin, 'destination': destination, 'flights': flights_list,
+            'totalFlights': len(table), 'coords': coords}
+
+
+def record_alert_price(origin, dest, search_date, current_price):
+    """Hängt den geprüften Preis an die Preis-Zeitreihe der Route an (für das Verlaufs-Diagramm)"""
+    if not flight_history:
+        return
+    try:
+        flight_history.record_price(origin, dest, search_date, current_price)
+    except Exception as e:
+        print(f"   ⚠️ Preisverlauf konnte nicht gespeichert werden: {e}")
+
+
+def check_alert_route(origin, dest, search_date, fresh=True):
+    """
+    Aktueller günstigster Preis einer Alarm-Route (oder None).
+    Sucht standardmäßig frisch; mit `fresh=False` wird ein noch gültiges Ergebnis aus Cache/Historie
+    verwendet (z.B. für die manuelle Prüfung). Nur frisch gesuchte Preise werden an die Preis-Zeitreihe
+    angehängt - ein Treffer aus Cache/Historie würde einen alten Preis mit aktuellem Zeitpunkt eintragen.
+    """
+    scraped = []
+    table = find_flights(origin, dest, search_date, fresh=fresh, purpose='alert',
+                         before_scrape=lambda: scraped.append(True))
+    current_price = table.cheapest_price()
+    if current_price is not None and (fresh or scraped):
+        record_alert_price(origin, dest, search_date, current_price)
+    return current_price
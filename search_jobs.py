@@ -0,0 +1,80 @@
+# Hintergrund-Jobs für die Flugsuche (Web-App)
+# Ein Scrape dauert mehrere Sekunden. Damit dabei kein Flask-Thread blockiert wird,
+# läuft die Suche in einem eigenen Executor und der Client fragt das Ergebnis per Job-ID ab.
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SearchJob:
+    """Status einer einzelnen Hintergrund-Suche"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'pending'  # pending -> running -> done / error
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        data = {'jobId': self.id, 'status': self.status}
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'error':
+            data['error'] = self.error
+        return data
+
+
+class SearchJobManager:
+    """Verwaltet Hintergrund-Suchen: starten, Status abfragen, auf Ergebnis warten"""
+
+    def __init__(self, max_workers=4, job_ttl=600):
+        self.job_ttl = job_ttl  # Sekunden, die fertige Jobs abrufbar bleiben
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Startet `fn` im Hintergrund und gibt sofort den Job zurück"""
+        self._cleanup()
+        job = SearchJob(uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = 'done'
+        except Exception as e:
+            print(f"❌ Such-Job {job.id} fehlgeschlagen: {e}")
+            job.error = str(e)
+            job.status = 'error'
+        finally:
+            job.finished_at = time.time()
+            job.done.set()
+
+    def _cleanup(self):
+        """Entfernt abgeschlossene Jobs, die älter als job_ttl sind"""
+        cutoff = time.time() - self.job_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+search_jobs = SearchJobManager(
+    max_workers=int(os.environ.get('TRAVELFOLIO_SEARCH_WORKERS', 4)),
+    job_ttl=int(os.environ.get('TRAVELFOLIO_SEARCH_JOB_TTL', 600)),
+)
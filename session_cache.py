@@ -0,0 +1,130 @@
+# Cache für verifizierte Session-Cookies (Web-App)
+# Bisher hat jede API-Anfrage das Session-Cookie mit check_revoked=True geprüft - die
+# Widerrufsprüfung ist ein Netzwerk-Aufruf zu Firebase. Jetzt werden die geprüften Claims
+# pro Cookie (nur dessen SHA-256-Hash wird gespeichert) kurz zwischengespeichert:
+# - nie über den Ablauf des Cookies ('exp') hinaus,
+# - spätestens nach `ttl` Sekunden wird das Cookie erneut lokal geprüft (Signatur/Ablauf),
+# - spätestens nach `revocation_interval` Sekunden wird erneut auf Widerruf geprüft (Netzwerk).
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+SESSION_CACHE_TTL = int(os.environ.get('TRAVELFOLIO_SESSION_CACHE_TTL', 300))
+SESSION_REVOCATION_INTERVAL = int(os.environ.get('TRAVELFOLIO_SESSION_REVOCATION_INTERVAL', 600))
+SESSION_CACHE_SIZE = int(os.environ.get('TRAVELFOLIO_SESSION_CACHE_SIZE', 10000))
+
+
+class _Entry:
+    __slots__ = ('claims', 'expires_at', 'verified_at', 'revocation_checked_at')
+
+    def __init__(self, claims, now, revocation_checked):
+        self.claims = claims
+        self.expires_at = claims.get('exp') or 0
+        self.verified_at = now
+        self.revocation_checked_at = now if revocation_checked else 0
+
+
+class SessionCache:
+    """
+    Verifizierte Claims pro Session-Cookie.
+    `verify(cookie, check_revoked)` ist die eigentliche Prüfung (z.B. auth.verify_session_cookie)
+    und wirft bei ungültigen Cookies eine Exception.
+    """
+
+    def __init__(self, verify, ttl=SESSION_CACHE_TTL, revocation_interval=SESSION_REVOCATION_INTERVAL,
+                 max_entries=SESSION_CACHE_SIZE):
+        self.verify = verify
+        self.ttl = ttl
+        self.revocation_interval = revocation_interval
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # Cookie-Hash -> _Entry, älteste Nutzung zuerst
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.local_checks = 0
+        self.revocation_checks = 0
+        self.failures = 0
+        self.evictions = 0
+        self.verify_seconds = 0.0
+
+    @staticmethod
+    def _key(cookie):
+        return hashlib.sha256(cookie.encode()).hexdigest()
+
+    def claims(self, cookie):
+        """Claims des Cookies oder None, wenn es ungültig, abgelaufen oder widerrufen ist"""
+        key = self._key(cookie)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry.expires_at:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                revocation_due = now - entry.revocation_checked_at >= self.revocation_interval
+                if not revocation_due and now - entry.verified_at < self.ttl:
+                    self.hits += 1
+                    return entry.claims
+            else:
+                self.misses += 1
+                revocation_due = True
+
+        # Prüfung außerhalb des Locks (Netzwerk-Aufruf, wenn die Widerrufsprüfung fällig ist)
+        started = time.perf_counter()
+        try:
+            claims = self.verify(cookie, check_revoked=revocation_due)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                self._entries.pop(key, None)
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.verify_seconds += elapsed
+                if revocation_due:
+                    self.revocation_checks += 1
+                else:
+                    self.local_checks += 1
+
+        with self._lock:
+            new_entry = _Entry(claims, time.time(), revocation_due)
+            if not revocation_due and entry is not None:
+                new_entry.revocation_checked_at = entry.revocation_checked_at
+            self._entries[key] = new_entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return claims
+
+    def invalidate(self, cookie):
+        """Entfernt ein Cookie aus dem Cache (z.B. beim Logout)"""
+        with self._lock:
+            self._entries.pop(self._key(cookie), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            checks = self.local_checks + self.revocation_checks
+            lookups = self.hits + checks  # Jede Anfrage ist entweder ein Treffer oder löst eine Prüfung aus
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'localChecks': self.local_checks,
+                'revocationChecks': self.revocation_checks,
+                'failures': self.failures,
+                'evictions': self.evictions,
+                'avgVerifySeconds': round(self.verify_seconds / checks, 4) if checks else 0.0,
+                'ttl': self.ttl,
+                'revocationInterval': self.revocation_interval,
+            }
@@ -0,0 +1,465 @@
+# Speicher-Backends für Trips, Alerts und Grabsteine (Web-App und Desktop-App)
+# Der restliche Code spricht die Firestore-API (collection/document/stream/where/batch/...).
+# Neben dem echten Firestore-Client gibt es hier zwei lokale Backends mit derselben (Teil-)API:
+# - 'memory': alles im Arbeitsspeicher, z.B. für Lasttests ohne Netzwerk
+# - 'sqlite': ein Dokument pro Zeile in einer lokalen SQLite-Datenbank (WAL-Modus)
+# Auswahl über TRAVELFOLIO_STORAGE=firestore|memory|sqlite (Standard: Firestore, wenn der Schlüssel
+# vorhanden ist), Pfad der SQLite-Datenbank über TRAVELFOLIO_STORAGE_DB.
+import os
+import copy
+import json
+import uuid
+import sqlite3
+import threading
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.api_core.exceptions import NotFound as FirestoreNotFound
+
+FIREBASE_KEY_PATH = "./firebase-key/travel-e75e6-firebase-adminsdk-fbsvc-7ba67c5552.json"
+DEFAULT_SQLITE_PATH = os.path.join(os.path.expanduser("~"), ".travelfolio", "storage.sqlite3")
+BACKENDS = ('firestore', 'memory', 'sqlite')
+
+DOCUMENT_ID = '__name__'  # Entspricht firestore.FieldPath.document_id()
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+
+class NotFound(Exception):
+    """update() auf ein nicht vorhandenes Dokument (wie google.api_core.exceptions.NotFound)"""
+
+
+# Für except-Klauseln, die mit allen Backends funktionieren sollen
+NOT_FOUND_ERRORS = (NotFound, FirestoreNotFound)
+
+
+def init_firebase(key_path=FIREBASE_KEY_PATH):
+    """Initialisiert das Firebase Admin SDK (Auth und Firestore), False wenn der Schlüssel fehlt"""
+    if firebase_admin._apps:
+        return True
+    if not os.path.exists(key_path):
+        return False
+    firebase_admin.initialize_app(credentials.Certificate(key_path))
+    return True
+
+
+def open_storage(backend=None, fallback=None, sqlite_path=None):
+    """
+    Öffnet das konfigurierte Backend.
+    Ohne Angabe wird Firestore verwendet, wenn der Schlüssel vorhanden ist, sonst `fallback`
+    ('memory', 'sqlite' oder None = kein Speicher).
+    """
+    backend = (backend or os.environ.get('TRAVELFOLIO_STORAGE') or '').strip().lower()
+    if backend and backend not in BACKENDS:
+        raise ValueError(f"Unbekanntes Speicher-Backend: {backend} (erlaubt: {', '.join(BACKENDS)})")
+
+    firebase_ready = init_firebase()  # Auch bei lokalem Speicher, damit der Login funktioniert
+    if backend in ('', 'firestore'):
+        if firebase_ready:
+            print("☁️ Speicher: Firestore")
+            return firestore.client()
+        print(f"WARNUNG: Firebase Key nicht gefunden unter {FIREBASE_KEY_PATH}")
+        backend = fallback
+
+    if backend == 'memory':
+        print("🧠 Speicher: Arbeitsspeicher (geht beim Beenden verloren)")
+        return MemoryClient()
+    if backend == 'sqlite':
+        path = sqlite_path or os.environ.get('TRAVELFOLIO_STORAGE_DB') or DEFAULT_SQLITE_PATH
+        print(f"💾 Speicher: SQLite ({path})")
+        return SqliteClient(path)
+    return None
+
+
+# --- Datenhaltung der lokalen Backends ---
+# Dokumente werden über ihren vollen Pfad adressiert ('artifacts/app/users/uid/trips/abc');
+# Eltern-Dokumente müssen (wie in Firestore) nicht existieren.
+
+def _split(path):
+    """'a/b/c/d' -> ('a/b/c', 'c', 'd'): Collection-Pfad, Collection-ID, Dokument-ID"""
+    parent, _, doc_id = path.rpartition('/')
+    return parent, parent.rpartition('/')[2], doc_id
+
+
+class _MemoryStore:
+    def __init__(self):
+        self._docs = {}  # Pfad -> Daten
+        self._by_collection = {}  # Collection-ID -> Menge der Pfade (für Collection-Group-Abfragen)
+        self.lock = threading.RLock()
+
+    def get(self, path):
+        with self.lock:
+            data = self._docs.get(path)
+        return copy.deepcopy(data) if data is not None else None
+
+    def apply(self, writes):
+        """Schreibt [(path, data oder None für Löschen)] atomar"""
+        with self.lock:
+            for path, data in writes:
+                collection_id = _split(path)[1]
+                if data is None:
+                    self._docs.pop(path, None)
+                    self._by_collection.get(collection_id, set()).discard(path)
+                else:
+                    self._docs[path] = copy.deepcopy(data)
+                    self._by_collection.setdefault(collection_id, set()).add(path)
+
+    def scan(self, parent=None, collection_id=None, after=None, limit=None):
+        """Dokumente einer Collection (`parent`) oder Collection-Gruppe als [(path, data)], nach Pfad sortiert"""
+        with self.lock:
+            if parent is not None:
+                paths = [p for p in self._by_collection.get(parent.rpartition('/')[2], ()) if _split(p)[0] == parent]
+            else:
+                paths = list(self._by_collection.get(collection_id, ()))
+            paths.sort()
+            if after is not None:
+                paths = [p for p in paths if p > after]
+            if limit:
+                paths = paths[:limit]
+            return [(p, copy.deepcopy(self._docs[p])) for p in paths]
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_parent ON documents (parent, path);
+CREATE INDEX IF NOT EXISTS idx_documents_collection ON documents (collection, path);
+"""
+
+
+class _SqliteStore:
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self.lock = threading.RLock()
+
+    def _connection(self):
+        """Öffnet die Datenbank beim ersten Zugriff (Aufrufer hält self.lock)"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SQLITE_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, path):
+        with self.lock:
+            row = self._connection().execute('SELECT data FROM documents WHERE path = ?', (path,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def apply(self, writes):
+        with self.lock:
+            conn = self._connection()
+            with conn:
+                for path, data in writes:
+                    if data is None:
+                        conn.execute('DELETE FROM documents WHERE path = ?', (path,))
+                    else:
+                        parent, collection_id, _ = _split(path)
+                        conn.execute('INSERT INTO documents (path, parent, collection, data) VALUES (?, ?, ?, ?) '
+                                     'ON CONFLICT(path) DO UPDATE SET data = excluded.data',
+                                     (path, parent, collection_id, json.dumps(data)))
+
+    def scan(self, parent=None, collection_id=None, after=None, limit=None):
+        if parent is not None:
+            query, params = 'SELECT path, data FROM documents WHERE parent = ?', [parent]
+        else:
+            query, params = 'SELECT path, data FROM documents WHERE collection = ?', [collection_id]
+        if after is not None:
+            query += ' AND path > ?'
+            params.append(after)
+        query += ' ORDER BY path'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self.lock:
+            rows = self._connection().execute(query, params).fetchall()
+        return [(path, json.loads(data)) for path, data in rows]
+
+
+# --- Firestore-ähnliche API ---
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return _field(self._data or {}, field)
+
+
+class DocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    @property
+    def id(self):
+        return self.path.rpartition('/')[2]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._client, self.path.rpartition('/')[0])
+
+    def collection(self, collection_id):
+        return CollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def get(self):
+        return DocumentSnapshot(self, self._client._store.get(self.path))
+
+    def set(self, data, merge=False):
+        batch = self._client.batch()
+        batch.set(self, data, merge=merge)
+        batch.commit()
+
+    def update(self, data):
+        batch = self._client.batch()
+        batch.update(self, data)
+        batch.commit()
+
+    def delete(self):
+        self._client._store.apply([(self.path, None)])
+
+
+class Query:
+    def __init__(self, client, parent=None, collection_id=None, filters=(), orders=(), limit=None, after=None):
+        self._client = client
+        self._parent = parent  # Collection-Pfad, None bei Collection-Group-Abfragen
+        self._collection_id = collection_id
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._after = after  # DocumentSnapshot oder Dict mit den Werten der Sortierfelder
+
+    def _copy(self, **changes):
+        state = {'parent': self._parent, 'collection_id': self._collection_id, 'filters': self._filters,
+                 'orders': self._orders, 'limit': self._limit, 'after': self._after}
+        state.update(changes)
+        return Query(self._client, **state)
+
+    def where(self, field, op, value):
+        if op not in _OPERATORS:
+            raise ValueError(f"Nicht unterstützter Operator: {op}")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((str(field), direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, document):
+        return self._copy(after=document)
+
+    def stream(self):
+        store = self._client._store
+        by_name_only = all(field == DOCUMENT_ID and direction == ASCENDING for field, direction in self._orders)
+
+        if not self._filters and by_name_only and (self._after is None or isinstance(self._after, DocumentSnapshot)):
+            # Schneller Weg: Sortierung nach Pfad und Limit direkt im Backend
+            after = self._cursor_values()[-1] if self._after is not None else None
+            rows = store.scan(self._parent, self._collection_id, after=after, limit=self._limit)
+        else:
+            rows = store.scan(self._parent, self._collection_id)
+            rows = [(path, data) for path, data in rows
+                    if all(_matches(data, field, op, value) for field, op, value in self._filters)]
+            rows = self._sort(rows)
+            if self._after is not None:
+                cursor = self._cursor_values()
+                rows = [row for row in rows if _after(self._sort_values(row), cursor, self._directions())]
+            if self._limit:
+                rows = rows[:self._limit]
+
+        for path, data in rows:
+            yield DocumentSnapshot(DocumentReference(self._client, path), data)
+
+    def get(self):
+        return list(self.stream())
+
+    def _directions(self):
+        return [direction for _, direction in self._orders] + [ASCENDING]
+
+    def _sort_values(self, row):
+        path, data = row
+        return [path if field == DOCUMENT_ID else _field(data, field) for field, _ in self._orders] + [path]
+
+    def _cursor_values(self):
+        if isinstance(self._after, DocumentSnapshot):
+            return self._sort_values((self._after.reference.path, self._after._data or {}))
+        # Cursor aus Werten: gleiche Werte liegen nicht dahinter (Pfad-Schranke größer als jeder Pfad)
+        return [self._after.get(field) for field, _ in self._orders] + ['\uffff']
+
+    def _sort(self, rows):
+        # Wie in Firestore: Dokumente ohne Sortierfeld fallen heraus, bei Gleichstand entscheidet der Pfad
+        for field, _ in self._orders:
+            if field != DOCUMENT_ID:
+                rows = [row for row in rows if _field(row[1], field) is not None]
+        rows = sorted(rows, key=lambda row: row[0])
+        for field, direction in reversed(self._orders):
+            rows.sort(key=lambda row: row[0] if field == DOCUMENT_ID else _sort_key(_field(row[1], field)),
+                      reverse=direction == DESCENDING)
+        return rows
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        super().__init__(client, parent=path)
+        self.path = path
+
+    @property
+    def id(self):
+        return self.path.rpartition('/')[2]
+
+    @property
+    def parent(self):
+        parent_path = self.path.rpartition('/')[0]
+        return DocumentReference(self._client, parent_path) if parent_path else None
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, f"{self.path}/{document_id or uuid.uuid4().hex}")
+
+    def add(self, data):
+        doc_ref = self.document()
+        doc_ref.set(data)
+        return None, doc_ref
+
+
+class WriteBatch:
+    """Sammelt Schreibvorgänge und wendet sie bei commit() atomar an"""
+
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(('set', reference.path, copy.deepcopy(data), merge))
+
+    def update(self, reference, data):
+        self._ops.append(('update', reference.path, copy.deepcopy(data), True))
+
+    def delete(self, reference):
+        self._ops.append(('delete', reference.path, None, False))
+
+    def commit(self):
+        store = self._client._store
+        with store.lock:
+            pending = {}  # Stand der Dokumente innerhalb des Batches
+            for op, path, data, merge in self._ops:
+                current = pending[path] if path in pending else store.get(path)
+                if op == 'delete':
+                    pending[path] = None
+                elif op == 'update' and current is None:
+                    raise NotFound(f"Dokument nicht gefunden: {path}")
+                elif merge:
+                    pending[path] = {**(current or {}), **data}
+                else:
+                    pending[path] = data
+            store.apply(list(pending.items()))
+        self._ops = []
+
+
+class _LocalClient:
+    """Gemeinsame Client-API der lokalen Backends"""
+
+    def __init__(self, store):
+        self._store = store
+
+    def collection(self, path):
+        return CollectionReference(self, path)
+
+    def document(self, path):
+        return DocumentReference(self, path)
+
+    def collection_group(self, collection_id):
+        return Query(self, collection_id=collection_id)
+
+    def batch(self):
+        return WriteBatch(self)
+
+
+class MemoryClient(_LocalClient):
+    def __init__(self):
+        super().__init__(_MemoryStore())
+
+
+class SqliteClient(_LocalClient):
+    def __init__(self, path):
+        super().__init__(_SqliteStore(path))
+
+
+# --- Filter und Sortierung ---
+
+def _field(data, field):
+    """Feldwert, verschachtelte Felder mit Punkt ('a.b')"""
+    for part in field.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def _sort_key(value):
+    # Firestore sortiert gemischte Typen nach Typ-Reihenfolge; hier genügt Zahl < Text < Rest
+    if isinstance(value, bool):
+        return (0, int(value))
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, str(value))
+
+
+def _compare(a, b):
+    a, b = _sort_key(a), _sort_key(b)
+    return (a > b) - (a < b)
+
+
+def _after(values, cursor, directions):
+    """True, wenn die Sortierwerte hinter dem Cursor liegen"""
+    for value, bound, direction in zip(values, cursor, directions):
+        if bound is None:
+            return True
+        result = _compare(value, bound)
+        if result:
+            return result > 0 if direction == ASCENDING else result < 0
+    return False
+
+
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+    'not-in': lambda a, b: a not in b,
+    'array_contains': lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+def _matches(data, field, op, value):
+    actual = _field(data, field)
+    if actual is None and op not in ('==', 'in'):
+        return False  # Fehlende Felder erfüllen (wie in Firestore) keinen Vergleich
+    try:
+        return _OPERATORS[op](actual, value)
+    except TypeError:
+        return False  # Unterschiedliche Typen (z.B. Zahl mit Text) passen nie
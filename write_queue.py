@@ -0,0 +1,136 @@
+# Write-Behind-Queue für Firestore-Schreibvorgänge (Desktop-App)
+# Speichern/Löschen von Trips und Alerts blockiert nicht mehr den Qt-Hauptthread:
+# Jeder Vorgang wird sofort in der lokalen Datenbank vorgemerkt (LocalStore.queue_write) und von
+# einem Hintergrund-Thread gesammelt als Firestore-Batch geschrieben. Mehrfaches Speichern desselben
+# Dokuments wird dabei zu einem Schreibvorgang zusammengefasst. Ist Firestore nicht erreichbar, bleiben
+# die Vorgänge auf der Platte liegen und werden mit wachsendem Abstand (bzw. beim nächsten Start)
+# erneut geschrieben.
+import os
+import time
+import threading
+
+from data_sync import now_ms, stamp
+
+FLUSH_DELAY = float(os.environ.get('TRAVELFOLIO_WRITE_DELAY', 1.5))  # Sekunden sammeln vor dem Schreiben
+BATCH_LIMIT = 500  # Maximale Anzahl Vorgänge pro Firestore-Batch
+MAX_BACKOFF = 300  # Längste Wartezeit zwischen zwei Versuchen, wenn offline
+
+
+class WriteBehindQueue:
+    """Schreibt vorgemerkte Vorgänge aus einem LocalStore im Hintergrund nach Firestore"""
+
+    def __init__(self, store, client, flush_delay=FLUSH_DELAY, batch_limit=BATCH_LIMIT, max_backoff=MAX_BACKOFF):
+        self.store = store
+        self.client = client
+        self.flush_delay = flush_delay
+        self.batch_limit = batch_limit
+        self.max_backoff = max_backoff
+
+        self._wake = threading.Event()
+        self._idle = threading.Condition()
+        self._stopped = False
+        self._failures = 0
+        self.written = 0
+        self.batches = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name='firestore-write-behind', daemon=True)
+
+    def start(self):
+        """Startet den Hintergrund-Thread; liegen noch Vorgänge vom letzten Lauf vor, werden sie sofort geschrieben"""
+        pending = self.store.pending_count()
+        if pending:
+            print(f"📤 {pending} ausstehende Firestore-Änderungen vom letzten Start werden nachgeholt")
+            self._wake.set()
+        self._thread.start()
+        return self
+
+    def enqueue(self, path, op, data=None):
+        """Merkt 'set'/'delete' für ein Dokument vor (z.B. 'artifacts/.../trips/abc') und kehrt sofort zurück"""
+        self.store.queue_write(path, op, data)
+        self._wake.set()
+
+    def set(self, path, data):
+        self.enqueue(path, 'set', data)
+
+    def delete(self, path):
+        self.enqueue(path, 'delete')
+
+    def pending(self, prefix=None):
+        """Noch nicht geschriebene Vorgänge {path: (op, data)}, z.B. um geladene Daten zu ergänzen"""
+        return {path: (op, data) for path, op, data, _ in self.store.pending_writes(prefix=prefix)}
+
+    def flush(self, timeout=5.0):
+        """Wartet (höchstens `timeout` Sekunden), bis alle Vorgänge geschrieben sind, z.B. beim Beenden"""
+        deadline = time.monotonic() + timeout
+        self._failures = 0
+        self._wake.set()
+        with self._idle:
+            while self.store.pending_count():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(min(remaining, 0.5))
+        return True
+
+    def stop(self, timeout=5.0):
+        flushed = self.flush(timeout)
+        self._stopped = True
+        self._wake.set()
+        return flushed
+
+    def stats(self):
+        return {'pending': self.store.pending_count(), 'written': self.written, 'batches': self.batches,
+                'failures': self._failures, 'lastError': self.last_error}
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self._backoff() if self._failures else None)
+            if self._stopped:
+                break
+            self._wake.clear()
+            if not self._failures:
+                # Kurz sammeln, damit schnelle Folge-Änderungen im selben Batch landen
+                time.sleep(self.flush_delay)
+
+            try:
+                while self._write_batch():
+                    pass
+                if self._failures:
+                    print("📤 Firestore wieder erreichbar, ausstehende Änderungen geschrieben")
+                self._failures = 0
+                self.last_error = None
+            except Exception as e:
+                self._failures += 1
+                self.last_error = str(e)
+                print(f"⚠️ Firestore nicht erreichbar ({self.store.pending_count()} Änderungen ausstehend), "
+                      f"neuer Versuch in {self._backoff():.0f}s: {e}")
+
+            with self._idle:
+                self._idle.notify_all()
+
+    def _backoff(self):
+        return min(self.max_backoff, 2 ** self._failures)
+
+    def _write_batch(self):
+        """Schreibt bis zu batch_limit Vorgänge in einem Batch, gibt False zurück, wenn nichts mehr ansteht"""
+        ops = self.store.pending_writes(limit=self.batch_limit)
+        if not ops:
+            return False
+
+        # updatedAt beim Schreiben setzen, nicht beim Vormerken: nach einer Offline-Phase hätten andere
+        # Clients ihren Abrufzeitpunkt sonst schon hinter dem Zeitstempel und sähen die Änderung nie
+        written_at = now_ms()
+        batch = self.client.batch()
+        for path, op, data, _ in ops:
+            doc_ref = self.client.document(path)
+            if op == 'delete':
+                batch.delete(doc_ref)
+            else:
+                batch.set(doc_ref, stamp(data, written_at))
+        batch.commit()
+
+        self.store.ack_writes([(path, seq) for path, _, _, seq in ops])
+        self.written += len(ops)
+        self.batches += 1
+        return len(ops) == self.batch_limit